@@ -16,11 +16,23 @@ from azure.devops.connection import Connection  # type: ignore
 from azure.monitor.opentelemetry import configure_azure_monitor
 from msrest.authentication import BasicAuthentication
 from tinydb import TinyDB
+from tinydb.middlewares import CachingMiddleware
+from tinydb.storages import JSONStorage
 
 # _LOGGER is the logging instance for this file.
 _LOGGER = logging.getLogger(__name__)
 # ASANA_PAGE_SIZE contains the default value for the page size to send to the Asana API.
 ASANA_PAGE_SIZE = 100
+# ASANA_POOL_MAXSIZE optionally sets the number of connections the Asana client keeps open for reuse. When it is not set the
+# pool holds two connections per sync thread, or the Asana SDK default if that is larger. Requests made while every pooled
+# connection is busy open a new connection that is closed after use.
+ASANA_POOL_MAXSIZE = (
+    max(1, int(os.environ["ASANA_POOL_MAXSIZE"]))
+    if os.environ.get("ASANA_POOL_MAXSIZE")
+    else None
+)
+# THREAD_COUNT contains the max number of project threads to execute concurrently.
+THREAD_COUNT = max(1, int(os.environ.get("THREAD_COUNT", 8)))
 # ASANA_TAG_NAME defined the name of the tag to add to synced items.
 ASANA_TAG_NAME = os.environ.get("SYNCED_TAG_NAME", "synced")
 # SLEEP_TIME defines the sleep time between sync tasks in seconds.
@@ -47,10 +59,15 @@ class App:
         ado_work_client: ADO work client.
         ado_wit_client: ADO work item tracking client.
         asana_client: Asana client.
+        asana_tags_api: Asana TagsApi instance shared by all sync threads.
+        asana_tasks_api: Asana TasksApi instance shared by all sync threads.
         asana_page_size: The default page size for API calls, can be between 1-100.
+        asana_pool_maxsize: The maximum number of pooled connections used by the Asana client, or None to size the pool
+         from thread_count.
+        thread_count: The max number of projects to sync concurrently.
         asana_tag_name: Defines the name of the Asana tag to add to synced items.
         asana_tag_gid: stores the tag id for the named asana tag in asana_tag_name.
-        db: TinyDB database.
+        db: TinyDB database, cached in memory until flush_db is called.
         db_lock: Lock for the TinyDB database.
         matches: TinyDB table named "matches".
         config: TinyDB table named "config".
@@ -82,8 +99,12 @@ class App:
         self.ado_wit_client = None
         self.ado_work_client = None
         self.asana_client = None
+        self.asana_tags_api: asana.TagsApi = None
+        self.asana_tasks_api: asana.TasksApi = None
         self.asana_page_size = ASANA_PAGE_SIZE
+        self.asana_pool_maxsize = ASANA_POOL_MAXSIZE
         self.asana_tag_gid = None
+        self.thread_count = THREAD_COUNT
         self.asana_tag_name = ASANA_TAG_NAME
         self.db = None
         self.db_lock = threading.Lock()
@@ -117,22 +138,49 @@ class App:
         _LOGGER.debug("Connecting to Azure DevOps")
         ado_credentials = BasicAuthentication("", self.ado_pat)
         ado_connection = Connection(base_url=self.ado_url, creds=ado_credentials)
-        self.ado_core_client = ado_connection.clients.get_core_client()
-        self.ado_work_client = ado_connection.clients.get_work_client()
-        self.ado_wit_client = ado_connection.clients.get_work_item_tracking_client()
+        ado_clients = (
+            ado_connection.clients.get_core_client(),
+            ado_connection.clients.get_work_client(),
+            ado_connection.clients.get_work_item_tracking_client(),
+        )
+        # Keep each client's HTTP session open between calls, so requests reuse its connections.
+        for ado_client in ado_clients:
+            ado_client.config.keep_alive = True
+        self.ado_core_client, self.ado_work_client, self.ado_wit_client = ado_clients
         # Connect Asana.
         _LOGGER.debug("Connecting to Asana")
         asana_config = asana.Configuration()
         asana_config.access_token = self.asana_token
+        if self.asana_pool_maxsize is not None:
+            asana_config.connection_pool_maxsize = self.asana_pool_maxsize
+        else:
+            # Each project sync thread makes up to two Asana requests at once.
+            asana_config.connection_pool_maxsize = max(
+                asana_config.connection_pool_maxsize, 2 * self.thread_count
+            )
         self.asana_client = asana.ApiClient(asana_config)
+        # Create the Asana API instances shared by all sync threads.
+        self.asana_tags_api = asana.TagsApi(self.asana_client)
+        self.asana_tasks_api = asana.TasksApi(self.asana_client)
         # Configure application insights.
         configure_azure_monitor(
             connection_string=self.applicationinsights_connection_string,
         )
         # Setup tinydb.
         _LOGGER.debug("Opening local database")
+        # Keep the database in memory, it is written to disk by flush_db.
         self.db = TinyDB(
-            os.path.join(os.path.dirname(__package__), "data", "appdata.json")
+            os.path.join(os.path.dirname(__package__), "data", "appdata.json"),
+            storage=CachingMiddleware(JSONStorage),
         )
         self.matches = self.db.table("matches")
         self.config = self.db.table("config")
+
+    def flush_db(self) -> None:
+        """
+        Writes any cached changes in the TinyDB database to disk.
+        """
+        if self.db is None:
+            return
+        with self.db_lock:
+            self.db.storage.flush()
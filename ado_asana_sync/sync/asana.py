@@ -3,7 +3,6 @@
 
 from __future__ import annotations
 
-import asana  # type: ignore
 from asana.rest import ApiException  # type: ignore
 
 from ado_asana_sync.utils.logging_tracing import setup_logging_and_tracing
@@ -32,7 +31,7 @@ def get_asana_task(app: App, task_gid: str) -> dict | None:
                 "task_gid": task_gid,
             }
         )
-        api_instance = asana.TasksApi(app.asana_client)
+        api_instance = app.asana_tasks_api
         try:
             opts = {
                 "opt_fields": (
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import concurrent.futures
+import contextvars
 import json
 import os
 from dataclasses import dataclass
@@ -10,8 +11,10 @@ from time import sleep
 
 import asana  # type: ignore
 from asana.rest import ApiException  # type: ignore
+from azure.devops.exceptions import AzureDevOpsServiceError  # type: ignore
 from azure.devops.v7_0.work.models import TeamContext  # type: ignore
 from azure.devops.v7_0.work_item_tracking.models import WorkItem  # type: ignore
+from tinydb.table import Document
 
 from ado_asana_sync.utils.date import iso8601_utc
 from ado_asana_sync.utils.logging_tracing import setup_logging_and_tracing
@@ -20,20 +23,21 @@ from ado_asana_sync.utils.utils import safe_get
 from .app import App
 from .asana import get_asana_task
 from .task_item import TaskItem
+from .users import find_indexed_user, get_asana_users, get_task_user, index_asana_users
 
 # This module uses the logger and tracer instances _LOGGER and _TRACER for logging and tracing, respectively.
 _LOGGER, _TRACER = setup_logging_and_tracing(__name__)
 # _SYNC_THRESHOLD defines the number of days to continue syncing closed tasks, after this many days they will be removed from
 # the sync DB.
-_SYNC_THRESHOLD = os.environ.get("SYNC_THRESHOLD", 30)
+_SYNC_THRESHOLD = int(os.environ.get("SYNC_THRESHOLD", 30))
 # _CLOSED_STATES defines a list of states that will be considered as completed. If the ADO state matches one of these values
 # it will cause the linked Asana task to be closed.
-_CLOSED_STATES = set(
+_CLOSED_STATES = frozenset(
     state.strip()
     for state in os.environ.get("CLOSED_STATES", "Closed,Removed,Done").split(",")
 )
-# _THREAD_COUNT contains the max number of project threads to execute concurrently.
-_THREAD_COUNT = max(1, int(os.environ.get("THREAD_COUNT", 8)))
+# _ADO_BATCH_SIZE is the maximum number of work items ADO returns from a single get_work_items request.
+_ADO_BATCH_SIZE = 200
 
 # ADO field constants
 ADO_STATE = "System.State"
@@ -42,13 +46,16 @@ ADO_WORK_ITEM_TYPE = "System.WorkItemType"
 
 # Cache for custom fields
 CUSTOM_FIELDS_CACHE = {}
+# Caches for the gids of Asana workspaces by name, and of Asana projects by workspace gid and name
+ASANA_WORKSPACE_GID_CACHE: dict[str, str] = {}
+ASANA_PROJECT_GID_CACHE: dict[tuple[str, str], str] = {}
 CUSTOM_FIELDS_AVAILABLE = True
 LAST_CACHE_REFRESH = datetime.now(timezone.utc)
 CACHE_VALIDITY_DURATION = timedelta(hours=24)
 
 
 def start_sync(app: App) -> None:
-    _LOGGER.info("Defined closed states: %s", sorted(list(_CLOSED_STATES)))
+    _LOGGER.info("Defined closed states: %s", sorted(_CLOSED_STATES))
     try:
         app.asana_tag_gid = create_tag_if_not_existing(
             app,
@@ -64,17 +71,20 @@ def start_sync(app: App) -> None:
             # Check if the cache is valid
             global CUSTOM_FIELDS_CACHE, LAST_CACHE_REFRESH
             now = datetime.now(timezone.utc)
-            if (
-                CUSTOM_FIELDS_AVAILABLE
-                and now - LAST_CACHE_REFRESH >= CACHE_VALIDITY_DURATION
-            ):
-                CUSTOM_FIELDS_CACHE.clear()
+            if now - LAST_CACHE_REFRESH >= CACHE_VALIDITY_DURATION:
+                if CUSTOM_FIELDS_AVAILABLE:
+                    CUSTOM_FIELDS_CACHE.clear()
+                    _LOGGER.info("Custom field cache cleared")
+                ASANA_WORKSPACE_GID_CACHE.clear()
+                ASANA_PROJECT_GID_CACHE.clear()
                 LAST_CACHE_REFRESH = now
-                _LOGGER.info("Custom field cache cleared")
+                _LOGGER.info("Asana gid caches cleared")
 
             projects = read_projects()
-            # Use the lower of the _THREAD_COUNT and the length of projects.
-            optimal_thread_count = min(len(projects), _THREAD_COUNT)
+            # Resolve the shared Asana gids once, so the project threads read them from the cache.
+            resolve_asana_gids(app, projects)
+            # Use the lower of app.thread_count and the length of projects.
+            optimal_thread_count = min(len(projects), app.thread_count)
             _LOGGER.info(
                 "Syncing %s projects using %s threads",
                 len(projects),
@@ -83,10 +93,23 @@ def start_sync(app: App) -> None:
             with concurrent.futures.ThreadPoolExecutor(
                 max_workers=optimal_thread_count
             ) as executor:
-                try:
-                    executor.map(sync_project, [app] * len(projects), projects)
-                except Exception as exception:
-                    _LOGGER.error("Error in sync_project thread: %s", exception)
+                futures = {
+                    executor.submit(sync_project, app, project): project
+                    for project in projects
+                }
+                # Log each project's failure as soon as it finishes.
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as exception:
+                        _LOGGER.error(
+                            "Error syncing project %s: %s",
+                            futures[future]["asanaProjectName"],
+                            exception,
+                        )
+
+            # Write the changes from all projects to disk once per sync run.
+            app.flush_db()
 
             _LOGGER.info(
                 "Sync process complete, sleeping for %s seconds", app.sleep_time
@@ -95,6 +118,27 @@ def start_sync(app: App) -> None:
         sleep(app.sleep_time)
 
 
+def resolve_asana_gids(app: App, projects: list) -> None:
+    """
+    Resolves the Asana workspace and project gids for the given projects into the gid cache.
+    """
+    # Each project reports its own lookup failure when it is synced.
+    try:
+        asana_workspace_id = get_asana_workspace(app, app.asana_workspace_name)
+    except Exception as exception:
+        _LOGGER.warning("Unable to resolve Asana workspace gid: %s", exception)
+        return
+    for project in projects:
+        try:
+            get_asana_project(app, asana_workspace_id, project["asanaProjectName"])
+        except Exception as exception:
+            _LOGGER.warning(
+                "Unable to resolve Asana project gid for %s: %s",
+                project["asanaProjectName"],
+                exception,
+            )
+
+
 def read_projects() -> list:
     """
     Read projects from JSON file and return as a list.
@@ -142,9 +186,9 @@ def create_tag_if_not_existing(app: App, workspace: str, tag: str) -> str | None
         if existing_tag is not None:
             # Store the tag_gid in the config table
             with app.db_lock:
-                app.config.upsert({"tag_gid": existing_tag["gid"]}, {"doc_id": 1})
+                app.config.upsert(Document({"tag_gid": existing_tag["gid"]}, doc_id=1))
             return existing_tag["gid"]
-        api_instance = asana.TagsApi(app.asana_client)
+        api_instance = app.asana_tags_api
         body = {"data": {"name": tag}}
         try:
             # Create a tag
@@ -152,7 +196,7 @@ def create_tag_if_not_existing(app: App, workspace: str, tag: str) -> str | None
             api_response = api_instance.create_tag_for_workspace(body, workspace, {})
             # Store the new tag_gid in the config table
             with app.db_lock:
-                app.config.upsert({"tag_gid": api_response["gid"]}, {"doc_id": 1})
+                app.config.upsert(Document({"tag_gid": api_response["gid"]}, doc_id=1))
             return api_response["gid"]
         except ApiException as exception:
             _LOGGER.error(
@@ -167,7 +211,7 @@ def get_tag_by_name(app: App, workspace: str, tag: str) -> dict | None:
     Retrieves a tag by its name from a given workspace.
     """
     with _TRACER.start_as_current_span("get_tag_by_name"):
-        api_instance = asana.TagsApi(app.asana_client)
+        api_instance = app.asana_tags_api
         try:
             # Get all tags in the workspace.
             _LOGGER.info("get workspace tag '%s'", tag)
@@ -187,7 +231,7 @@ def get_asana_task_tags(app: App, task: TaskItem) -> list[dict]:
     Retrieves the tags assigned to a given Asana task.
     """
     with _TRACER.start_as_current_span("get_asana_task_tags"):
-        api_instance = asana.TagsApi(app.asana_client)
+        api_instance = app.asana_tags_api
 
         try:
             # Get a task's tags
@@ -200,12 +244,17 @@ def get_asana_task_tags(app: App, task: TaskItem) -> list[dict]:
             return []
 
 
-def tag_asana_item(app: App, task: TaskItem, tag: str) -> None:
+def tag_asana_item(
+    app: App, task: TaskItem, tag: str, task_tags: list[dict] | None = None
+) -> None:
     """
     Adds a tag to a given item if it is not already assigned.
+
+    The task's current tags are requested from Asana unless they are passed in as task_tags.
     """
-    api_instance = asana.TasksApi(app.asana_client)
-    task_tags = get_asana_task_tags(app, task)
+    api_instance = app.asana_tasks_api
+    if task_tags is None:
+        task_tags = get_asana_task_tags(app, task)
     task_tags_gids = [t["gid"] for t in task_tags]
     if tag not in task_tags_gids:
         # Add the tag to the task.
@@ -223,6 +272,21 @@ def tag_asana_item(app: App, task: TaskItem, tag: str) -> None:
     return None
 
 
+@dataclass
+class ProjectSyncContext:
+    """
+    Class to store the Asana and database lookups shared by all items in a single project sync.
+    """
+
+    asana_project: str
+    asana_users_index: dict[tuple[str, str], tuple[int, dict]]
+    asana_tasks_by_gid: dict[str, dict]
+    asana_tasks_by_name: dict[str, dict]
+    matches_by_ado_id: dict[int, dict]
+    link_custom_field_id: str | None
+    sync_time: str
+
+
 def sync_project(app: App, project):
     """
     Synchronizes a project by mapping ADO work items to Asana tasks.
@@ -244,33 +308,83 @@ def sync_project(app: App, project):
     except Exception as e:
         _LOGGER.error("Error getting project IDs: %s", e)
         return
+    if asana_project is None:
+        _LOGGER.error(
+            "Asana project %s not found in workspace %s",
+            project["asanaProjectName"],
+            app.asana_workspace_name,
+        )
+        return
 
-    # Get all Asana users in the workspace, this will enable user matching.
-    asana_users = get_asana_users(app, asana_workspace_id)
-
-    # Get all Asana Tasks in this project.
     _LOGGER.info(
         "Getting all Asana tasks for project %s [%s]",
         project["adoProjectName"],
         asana_project,
     )
-    asana_project_tasks = get_asana_project_tasks(app, asana_project)
+    asana_users, asana_project_tasks, ado_items = get_project_items(
+        app, ado_project, ado_team, asana_workspace_id, asana_project
+    )
 
-    # Get the backlog items for the ADO project and team.
-    ado_items = app.ado_work_client.get_backlog_level_work_items(
-        TeamContext(team_id=ado_team.id, project_id=ado_project.id),
-        "Microsoft.RequirementCategory",
+    context = ProjectSyncContext(
+        asana_project=asana_project,
+        asana_users_index=index_asana_users(asana_users),
+        asana_tasks_by_gid={task["gid"]: task for task in asana_project_tasks},
+        asana_tasks_by_name=index_asana_tasks_by_name(asana_project_tasks),
+        matches_by_ado_id=index_matches_by_ado_id(app.matches.all()),
+        link_custom_field_id=get_link_custom_field_id(app, asana_project),
+        # One timestamp for the project sync, used for every item created or updated.
+        sync_time=iso8601_utc(datetime.now(timezone.utc)),
     )
 
     # Process backlog items
-    process_backlog_items(
-        app, ado_items, asana_users, asana_project_tasks, asana_project
-    )
+    process_backlog_items(app, ado_items, context)
 
     # Process any existing matched items that are no longer returned in the backlog (closed or removed).
-    all_tasks = app.matches.all()
+    # Read the matches again, as the table is shared with the other project threads and may have been updated by them.
     processed_item_ids = set(item.target.id for item in ado_items.work_items)
-    process_closed_items(app, all_tasks, processed_item_ids, asana_users, asana_project)
+    process_closed_items(app, project, app.matches.all(), processed_item_ids, context)
+
+
+def get_project_items(
+    app: App, ado_project, ado_team, asana_workspace_id: str, asana_project: str
+) -> Tuple[list[dict], list[dict], Any]:
+    """
+    Returns the Asana workspace users, the Asana project tasks and the ADO backlog items for a project sync.
+
+    The three are independent, so they are fetched concurrently. Each call runs in a copy of this thread's context, so its
+    spans are recorded under the current trace.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        # Get all Asana users in the workspace, this will enable user matching.
+        asana_users_future = executor.submit(
+            contextvars.copy_context().run, get_asana_users, app, asana_workspace_id
+        )
+        # Get all Asana Tasks in this project.
+        asana_tasks_future = executor.submit(
+            contextvars.copy_context().run, get_asana_project_tasks, app, asana_project
+        )
+        # Get the backlog items for the ADO project and team.
+        ado_items_future = executor.submit(
+            contextvars.copy_context().run,
+            app.ado_work_client.get_backlog_level_work_items,
+            TeamContext(team_id=ado_team.id, project_id=ado_project.id),
+            "Microsoft.RequirementCategory",
+        )
+        return (
+            asana_users_future.result(),
+            asana_tasks_future.result(),
+            ado_items_future.result(),
+        )
+
+
+def index_matches_by_ado_id(all_tasks: list[dict]) -> dict[int, dict]:
+    """
+    Index the matches records by ADO ID, keeping the first record for each work item.
+    """
+    matches_by_ado_id: dict[int, dict] = {}
+    for task in all_tasks:
+        matches_by_ado_id.setdefault(task["ado_id"], task)
+    return matches_by_ado_id
 
 
 def get_project_ids(app: App, project) -> Tuple[Any, Any, str, str | None]:
@@ -280,7 +394,7 @@ def get_project_ids(app: App, project) -> Tuple[Any, Any, str, str | None]:
     try:
         # Get the ADO project by name.
         ado_project = app.ado_core_client.get_project(project["adoProjectName"])
-    except NameError as exception:
+    except (NameError, AzureDevOpsServiceError) as exception:
         _LOGGER.error(
             "ADO project %s not found: %s", project["adoProjectName"], exception
         )
@@ -291,7 +405,7 @@ def get_project_ids(app: App, project) -> Tuple[Any, Any, str, str | None]:
         ado_team = app.ado_core_client.get_team(
             project["adoProjectName"], project["adoTeamName"]
         )
-    except NameError as exception:
+    except (NameError, AzureDevOpsServiceError) as exception:
         _LOGGER.error(
             "ADO team %s not found in project %s: %s",
             project["adoTeamName"],
@@ -326,27 +440,49 @@ def get_project_ids(app: App, project) -> Tuple[Any, Any, str, str | None]:
     return ado_project, ado_team, asana_workspace_id, asana_project
 
 
-def process_backlog_items(
-    app, ado_items, asana_users, asana_project_tasks, asana_project
-):
+def process_backlog_items(app, ado_items, context: ProjectSyncContext):
     """
     Processes the backlog items from ADO.
     """
-    for wi in ado_items.work_items:
-        # Get the work item from the ID
-        ado_task = app.ado_wit_client.get_work_item(wi.target.id)
-        process_backlog_item(
-            app, ado_task, asana_users, asana_project_tasks, asana_project
-        )
+    ado_tasks = get_ado_work_items(app, [wi.target.id for wi in ado_items.work_items])
+    for ado_task in ado_tasks:
+        process_backlog_item(app, ado_task, context)
 
 
-def process_backlog_item(
-    app, ado_task, asana_users, asana_project_tasks, asana_project
-):
+def get_ado_work_items(app: App, ids: list[int]) -> list[WorkItem]:
+    """
+    Retrieves the ADO work items with the given IDs, requesting up to _ADO_BATCH_SIZE items per call.
+
+    Work items that no longer exist or cannot be read, or that are in a batch that fails, are left out of the result.
+    """
+    # Request each ID once, keeping the order they were given in.
+    ids = list(dict.fromkeys(ids))
+    work_items: list[WorkItem] = []
+    for start in range(0, len(ids), _ADO_BATCH_SIZE):
+        try:
+            # Expand the links so each item carries the same html link as a single get_work_item call.
+            batch = app.ado_wit_client.get_work_items(
+                ids[start : start + _ADO_BATCH_SIZE],
+                expand="Links",
+                error_policy="Omit",
+            )
+        except AzureDevOpsServiceError as exception:
+            _LOGGER.error("Failed to get ADO work items: %s", exception)
+            continue
+        work_items.extend(wi for wi in batch if wi is not None)
+    return work_items
+
+
+def process_backlog_item(app, ado_task, context: ProjectSyncContext):
     """
     Processes a single backlog item.
+
+    The existing match is looked up in the database records read once per project sync.
     """
-    existing_match = TaskItem.search(app, ado_id=ado_task.id)
+    match_data = context.matches_by_ado_id.get(ado_task.id)
+    existing_match = (
+        TaskItem.from_record(match_data) if match_data is not None else None
+    )
     ado_assigned = get_task_user(ado_task)
 
     if ado_assigned is None and existing_match is None:
@@ -356,36 +492,31 @@ def process_backlog_item(
         )
         return
 
-    asana_matched_user = matching_user(asana_users, ado_assigned)
+    asana_matched_user = find_indexed_user(context.asana_users_index, ado_assigned)
     if asana_matched_user is None and existing_match is None:
         return
 
     if existing_match is None:
-        create_new_task_mapping(
-            app, ado_task, asana_matched_user, asana_project_tasks, asana_project
-        )
+        create_new_task_mapping(app, ado_task, asana_matched_user, context)
     else:
-        update_existing_task(
-            app, ado_task, existing_match, asana_matched_user, asana_project
-        )
+        update_existing_task(app, ado_task, existing_match, asana_matched_user, context)
 
 
 def create_new_task_mapping(
-    app, ado_task, asana_matched_user, asana_project_tasks, asana_project
+    app, ado_task, asana_matched_user, context: ProjectSyncContext
 ):
     """
     Creates a new task mapping between ADO and Asana.
     """
     _LOGGER.info("%s:unmapped task", ado_task.fields[ADO_TITLE])
-    current_utc_time = iso8601_utc(datetime.now(timezone.utc))
     existing_match = TaskItem(
         ado_id=ado_task.id,
         ado_rev=ado_task.rev,
         title=ado_task.fields[ADO_TITLE],
         item_type=ado_task.fields[ADO_WORK_ITEM_TYPE],
         state=ado_task.fields[ADO_STATE],
-        created_date=current_utc_time,
-        updated_date=current_utc_time,
+        created_date=context.sync_time,
+        updated_date=context.sync_time,
         url=safe_get(ado_task, "_links", "additional_properties", "html", "href"),
         assigned_to=(
             asana_matched_user.get("gid", None)
@@ -394,7 +525,7 @@ def create_new_task_mapping(
         ),
     )
     # Check if there is a matching asana task with a matching title.
-    asana_task = get_asana_task_by_name(asana_project_tasks, existing_match.asana_title)
+    asana_task = context.asana_tasks_by_name.get(existing_match.asana_title)
     if asana_task is None:
         # The Asana task does not exist, create it and map the tasks.
         _LOGGER.info(
@@ -403,9 +534,10 @@ def create_new_task_mapping(
         )
         create_asana_task(
             app,
-            asana_project,
+            context.asana_project,
             existing_match,
             app.asana_tag_gid,
+            context.link_custom_field_id,
         )
     else:
         # The Asana task exists, map the tasks in the db.
@@ -415,127 +547,152 @@ def create_new_task_mapping(
             app,
             existing_match,
             app.asana_tag_gid,
-            asana_project,
+            context.link_custom_field_id,
         )
 
 
 def update_existing_task(
-    app, ado_task, existing_match, asana_matched_user, asana_project
+    app, ado_task, existing_match, asana_matched_user, context: ProjectSyncContext
 ):
     """
     Updates an existing Asana task based on ADO changes.
     """
-    if existing_match.is_current(app):
-        _LOGGER.info("%s:task is already up to date", existing_match.asana_title)
+    if existing_match.is_current(app, context.asana_tasks_by_gid, ado_task):
+        _LOGGER.info("%s:task is already up to date", existing_match)
         return
 
-    _LOGGER.info("%s:task has been updated, updating task", existing_match.asana_title)
-    asana_task = get_asana_task(app, existing_match.asana_gid)
-    if asana_task is None:
-        _LOGGER.error("No Asana task found with gid: %s", existing_match.asana_gid)
-        return
-    existing_match.ado_rev = ado_task.rev
-    existing_match.title = ado_task.fields[ADO_TITLE]
-    existing_match.item_type = ado_task.fields[ADO_WORK_ITEM_TYPE]
-    existing_match.state = ado_task.fields[ADO_STATE]
-    existing_match.updated_date = iso8601_utc(datetime.now())
-    existing_match.url = safe_get(
-        ado_task, "_links", "additional_properties", "html", "href"
-    )
-    existing_match.assigned_to = (
-        asana_matched_user.get("gid", None) if asana_matched_user is not None else None
-    )
-    existing_match.asana_updated = asana_task["modified_at"]
-    update_asana_task(
-        app,
-        existing_match,
-        app.asana_tag_gid,
-        asana_project,
-    )
+    _LOGGER.info("%s:task has been updated, updating task", existing_match)
+    apply_ado_changes(app, ado_task, existing_match, asana_matched_user, context)
 
 
 def process_closed_items(
-    app, all_tasks, processed_item_ids, asana_users, asana_project
+    app, project, all_tasks, processed_item_ids, context: ProjectSyncContext
 ):
     """
     Processes items that are closed or removed from the backlog.
     """
+    expired_items = []
+    closed_items: dict[int, TaskItem] = {}
+    cutoff = sync_threshold_cutoff()
     for wi in all_tasks:
         if wi["ado_id"] not in processed_item_ids:
-            _LOGGER.debug("Processing closed item %s", wi["ado_id"])
-            if is_item_older_than_threshold(wi):
-                remove_mapping(app, wi)
+            if is_item_older_than_threshold(wi, cutoff):
+                expired_items.append(wi)
                 continue
 
-            existing_match = get_existing_match(app, wi)
-            if existing_match is None:
-                continue
+            # Only check the first record for each work item, as the backlog pass does.
+            if wi["ado_id"] not in closed_items:
+                closed_items[wi["ado_id"]] = TaskItem.from_record(wi)
 
-            ado_task = app.ado_wit_client.get_work_item(existing_match.ado_id)
-            if existing_match.is_current(app):
-                _LOGGER.debug(
-                    "%s:Task is up to date",
-                    existing_match.asana_title,
-                )
-                continue
+    if not closed_items and not expired_items:
+        # Every stored mapping was handled in the backlog pass.
+        return
 
-            update_task_if_needed(
-                app, ado_task, existing_match, asana_users, asana_project
-            )
+    ado_tasks = {
+        ado_task.id: ado_task
+        for ado_task in get_ado_work_items(app, list(closed_items))
+    }
+    # Count the outcomes for the summary logged once all the items are processed.
+    not_found_count = 0
+    current_count = 0
+    updated_count = 0
+    for existing_match in closed_items.values():
+        ado_task = ado_tasks.get(existing_match.ado_id)
+        if ado_task is None:
+            # The work item has been deleted or cannot be read, the mapping is removed once it passes the threshold.
+            not_found_count += 1
+            continue
+
+        if existing_match.is_current(app, context.asana_tasks_by_gid, ado_task):
+            current_count += 1
+            continue
+
+        if update_task_if_needed(app, ado_task, existing_match, context):
+            updated_count += 1
 
+    _LOGGER.info(
+        "closed items for project %s: %s up to date, %s updated, %s not found, %s expired",
+        project["adoProjectName"],
+        current_count,
+        updated_count,
+        not_found_count,
+        len(expired_items),
+    )
+    remove_mappings(app, expired_items)
 
-def is_item_older_than_threshold(wi):
+
+def sync_threshold_cutoff() -> str:
     """
-    Determines if a work item is older than a specified threshold.
+    Returns the ISO 8601 UTC timestamp before which a work item is considered older than the sync threshold.
     """
-    return (
-        datetime.now(timezone.utc) - datetime.fromisoformat(wi["updated_date"])
-    ).days > _SYNC_THRESHOLD
+    # An item is expired once more than _SYNC_THRESHOLD whole days have passed since it was updated.
+    return iso8601_utc(datetime.now(timezone.utc) - timedelta(days=_SYNC_THRESHOLD + 1))
 
 
-def remove_mapping(app, wi):
+def is_item_older_than_threshold(wi, cutoff: str | None = None):
     """
-    Removes the mapping of a work item (wi) from the application's database if it has not been updated within a specified
-    threshold.
+    Determines if a work item is older than a specified threshold.
     """
-    _LOGGER.info(
-        "%s: %s:Task has not been updated in %s days, removing mapping",
-        wi["item_type"],
-        wi["title"],
-        _SYNC_THRESHOLD,
-    )
-    with app.db_lock:
-        app.matches.remove(doc_ids=[wi.doc_id])
+    if cutoff is None:
+        cutoff = sync_threshold_cutoff()
+    # Stored dates are ISO 8601 UTC strings from iso8601_utc, so they compare in date order without parsing.
+    return wi["updated_date"] <= cutoff
 
 
-def get_existing_match(app, wi):
+def remove_mappings(app, items):
     """
-    Searches for an existing match of a work item in the database.
+    Removes the mappings of work items from the application's database that have not been updated within a specified
+    threshold. All items are removed in a single database write.
     """
-    existing_match = TaskItem.search(app, ado_id=wi["ado_id"])
-    if existing_match is None:
-        _LOGGER.warning(
-            "Task with ADO ID %s not found in database",
-            wi["ado_id"],
+    if not items:
+        return
+    for wi in items:
+        _LOGGER.info(
+            "%s: %s:Task has not been updated in %s days, removing mapping",
+            wi["item_type"],
+            wi["title"],
+            _SYNC_THRESHOLD,
         )
-    return existing_match
+    with app.db_lock:
+        # Skip records already removed by another project thread, as removing a missing doc_id fails the whole batch.
+        doc_ids = [wi.doc_id for wi in items if app.matches.contains(doc_id=wi.doc_id)]
+        if doc_ids:
+            app.matches.remove(doc_ids=doc_ids)
 
 
-def update_task_if_needed(app, ado_task, existing_match, asana_users, asana_project):
+def update_task_if_needed(
+    app, ado_task, existing_match, context: ProjectSyncContext
+) -> bool:
     """
     Updates an Asana task if needed based on the provided Azure DevOps (ADO) task.
+
+    Returns True if the Asana task was updated.
     """
-    asana_task = get_asana_task(app, existing_match.asana_gid)
     ado_assigned = get_task_user(ado_task)
-    asana_matched_user = matching_user(asana_users, ado_assigned)
+    asana_matched_user = find_indexed_user(context.asana_users_index, ado_assigned)
+    return apply_ado_changes(app, ado_task, existing_match, asana_matched_user, context)
+
+
+def apply_ado_changes(
+    app, ado_task, existing_match, asana_matched_user, context: ProjectSyncContext
+) -> bool:
+    """
+    Copies the ADO task details to the existing match and updates the Asana task.
+
+    The Asana update is skipped when none of the synced fields have changed and the Asana task has not been modified since
+    it was last synced, in which case only the stored mapping is updated. Returns True if the Asana task was updated.
+    """
+    asana_task = get_project_asana_task(app, context, existing_match.asana_gid)
     if asana_task is None:
         _LOGGER.error("No Asana task found with gid: %s", existing_match.asana_gid)
-        return
+        return False
+    asana_unchanged = asana_task["modified_at"] == existing_match.asana_updated
+    previous_fields = asana_task_fields(existing_match)
     existing_match.ado_rev = ado_task.rev
     existing_match.title = ado_task.fields[ADO_TITLE]
     existing_match.item_type = ado_task.fields[ADO_WORK_ITEM_TYPE]
     existing_match.state = ado_task.fields[ADO_STATE]
-    existing_match.updated_date = iso8601_utc(datetime.now())
+    existing_match.updated_date = context.sync_time
     existing_match.url = safe_get(
         ado_task, "_links", "additional_properties", "html", "href"
     )
@@ -543,64 +700,41 @@ def update_task_if_needed(app, ado_task, existing_match, asana_users, asana_proj
         asana_matched_user.get("gid", None) if asana_matched_user is not None else None
     )
     existing_match.asana_updated = asana_task["modified_at"]
-    update_asana_task(
+    if asana_unchanged and asana_task_fields(existing_match) == previous_fields:
+        _LOGGER.info(
+            "%s:no synced fields changed, skipping Asana update", existing_match
+        )
+        existing_match.save(app)
+        return False
+    return update_asana_task(
         app,
         existing_match,
         app.asana_tag_gid,
-        asana_project,
+        context.link_custom_field_id,
     )
 
 
-@dataclass
-class ADOAssignedUser:
+def asana_task_fields(task: TaskItem) -> tuple:
     """
-    Class to store the details of the assigned user in ADO.
+    Returns the TaskItem fields that are written to the Asana task.
     """
-
-    display_name: str
-    email: str
-
-
-def get_task_user(task: WorkItem) -> ADOAssignedUser | None:
-    """
-    Return the email and display name of the user assigned to the Azure DevOps work item.
-    If no user is assigned, then return None.
-    """
-    assigned_to = task.fields.get("System.AssignedTo", None)
-    if assigned_to is not None:
-        display_name = assigned_to.get("displayName", None)
-        email = assigned_to.get("uniqueName", None)
-        if display_name is None or email is None:
-            return None
-        return ADOAssignedUser(display_name, email)
-    return None
-
-
-def matching_user(user_list: list[dict], ado_user: ADOAssignedUser) -> dict | None:
-    """
-    Check if a given email exists in a list of user dicts.
-    """
-    if ado_user is None:
-        return None
-    for user in user_list:
-        if (
-            user["email"].lower() == ado_user.email.lower()
-            or user["name"].lower() == ado_user.display_name.lower()
-        ):
-            return user
-    return None
+    return (task.title, task.item_type, task.state, task.url, task.assigned_to)
 
 
 def get_asana_workspace(app: App, name: str) -> str:
     """
     Returns the workspace gid for the named Asana workspace.
     """
+    if name in ASANA_WORKSPACE_GID_CACHE:
+        return ASANA_WORKSPACE_GID_CACHE[name]
+
     api_instance = asana.WorkspacesApi(app.asana_client)
     try:
         # Get all workspaces
         api_response = api_instance.get_workspaces(opts={})
         for w in api_response:
             if w["name"] == name:
+                ASANA_WORKSPACE_GID_CACHE[name] = w["gid"]
                 return w["gid"]
         raise NameError(f"No workspace found with name '{name}'")
     except ApiException as exception:
@@ -614,14 +748,22 @@ def get_asana_project(app: App, workspace_gid, name) -> str | None:
     """
     Returns the project gid for the named Asana project.
     """
+    cache_key = (workspace_gid, name)
+    if cache_key in ASANA_PROJECT_GID_CACHE:
+        return ASANA_PROJECT_GID_CACHE[cache_key]
+
     api_instance = asana.ProjectsApi(app.asana_client)
     try:
         # Get all projects
         opts = {"workspace": workspace_gid, "archived": False, "opt_fields": "name"}
         api_response = api_instance.get_projects(opts)
+        # Cache every project in the listing, so other synced projects in the workspace do not list them again.
+        project_gids: dict[tuple[str, str], str] = {}
         for p in api_response:
-            if p["name"] == name:
-                return p["gid"]
+            project_gids.setdefault((workspace_gid, p["name"]), p["gid"])
+        ASANA_PROJECT_GID_CACHE.update(project_gids)
+        if cache_key in project_gids:
+            return project_gids[cache_key]
         raise NameError(f"No project found with name '{name}'")
     except ApiException as exception:
         _LOGGER.error(
@@ -630,51 +772,48 @@ def get_asana_project(app: App, workspace_gid, name) -> str | None:
         return None
 
 
-def get_asana_task_by_name(task_list: list[dict], task_name: str) -> dict | None:
+def index_asana_tasks_by_name(task_list: list[dict]) -> dict[str, dict]:
     """
-    Returns the entire task dict for the named Asana task from the given list of tasks.
+    Index a list of Asana tasks by name, keeping the first task in the list for each name.
     """
-
+    tasks_by_name: dict[str, dict] = {}
     for t in task_list:
-        if t["name"] == task_name:
-            return t
-    return None
+        tasks_by_name.setdefault(t["name"], t)
+    return tasks_by_name
+
+
+def get_project_asana_task(
+    app: App, context: ProjectSyncContext, task_gid: str
+) -> dict | None:
+    """
+    Returns the task dict for the given gid from the tasks fetched for the project, falling back to the Asana API for tasks
+    outside the project. Tasks fetched from the API are kept for the rest of the project sync.
+    """
+    task = context.asana_tasks_by_gid.get(task_gid)
+    if task is None:
+        task = get_asana_task(app, task_gid)
+        if task is not None:
+            context.asana_tasks_by_gid[task_gid] = task
+    return task
 
 
 def get_asana_project_tasks(app: App, asana_project) -> list[dict]:
     """
     Returns a list of task dicts for the given Asana project.
     """
-    api_instance = asana.TasksApi(app.asana_client)
-    all_tasks = []
-    offset = None
+    api_instance = app.asana_tasks_api
+    api_params = {
+        "project": asana_project,
+        "limit": app.asana_page_size,
+        "opt_fields": (
+            "assignee_section,due_at,name,completed_at,tags,dependents,"
+            "projects,completed,permalink_url,parent,assignee,"
+            "assignee_status,num_subtasks,modified_at,workspace,due_on"
+        ),
+    }
     try:
-        # Get all tasks in the project.
-        while True:
-            api_params = {
-                "project": asana_project,
-                "limit": app.asana_page_size,
-                "opt_fields": (
-                    "assignee_section,due_at,name,completed_at,tags,dependents,"
-                    "projects,completed,permalink_url,parent,assignee,"
-                    "assignee_status,num_subtasks,modified_at,workspace,due_on"
-                ),
-            }
-            if offset:
-                api_params["offset"] = offset
-
-            api_response = api_instance.get_tasks(api_params)
-
-            # Append tasks to the all_tasks list.
-            all_tasks.extend(api_response)
-
-            # Check for continuation token in the response.
-            offset = None
-            for response in api_response:
-                offset = getattr(response.get("next_page"), "offset", None)
-            if not offset:
-                break
-        return all_tasks
+        # Get all tasks in the project, the client requests each page of limit tasks as the results are read.
+        return list(api_instance.get_tasks(api_params))
     except ApiException as exception:
         _LOGGER.error(
             "Exception in get_asana_project_tasks when calling TasksApi->get_tasks: %s",
@@ -683,27 +822,35 @@ def get_asana_project_tasks(app: App, asana_project) -> list[dict]:
         return []
 
 
-def create_asana_task(app: App, asana_project: str, task: TaskItem, tag: str) -> None:
+def is_task_completed(task: TaskItem) -> bool:
+    """
+    Returns True if the task's ADO state is one of the closed states, meaning the Asana task should be completed.
+    """
+    return task.state in _CLOSED_STATES
+
+
+def create_asana_task(
+    app: App,
+    asana_project: str,
+    task: TaskItem,
+    tag: str,
+    link_custom_field_id: str | None = None,
+) -> None:
     """
     Create an Asana task in the specified project.
+
+    The task's URL is written to the Link custom field when link_custom_field_id is given.
     """
-    tasks_api_instance = asana.TasksApi(app.asana_client)
-    # Find the custom field ID for 'link'
-    link_custom_field = find_custom_field_by_name(app, asana_project, "Link")
-    link_custom_field_id = (
-        link_custom_field.get("custom_field", {}).get("gid")
-        if link_custom_field
-        else None
-    )
+    tasks_api_instance = app.asana_tasks_api
 
-    body = {
+    body: dict[str, dict[str, Any]] = {
         "data": {
             "name": task.asana_title,
             "html_notes": f"<body>{task.asana_notes_link}</body>",
             "projects": [asana_project],
             "assignee": task.assigned_to,
             "tags": [tag],
-            "state": task.state in _CLOSED_STATES,
+            "completed": is_task_completed(task),
         },
     }
 
@@ -715,34 +862,27 @@ def create_asana_task(app: App, asana_project: str, task: TaskItem, tag: str) ->
         # add the match to the db.
         task.asana_gid = result["gid"]
         task.asana_updated = result["modified_at"]
-        task.updated_date = iso8601_utc(datetime.now())
         task.save(app)
     except ApiException as exception:
         _LOGGER.error("Exception when calling TasksApi->create_task: %s\n", exception)
 
 
 def update_asana_task(
-    app: App, task: TaskItem, tag: str, asana_project_gid: str
-) -> None:
-    """
-    Update an Asana task with the provided task details.
+    app: App, task: TaskItem, tag: str, link_custom_field_id: str | None = None
+) -> bool:
     """
-    tasks_api_instance = asana.TasksApi(app.asana_client)
+    Update an Asana task with the provided task details, returning True if the update succeeded.
 
-    # Find the custom field ID for 'link'
-    link_custom_field = find_custom_field_by_name(app, asana_project_gid, "Link")
-    link_custom_field_id = (
-        link_custom_field.get("custom_field", {}).get("gid")
-        if link_custom_field
-        else None
-    )
+    The task's URL is written to the Link custom field when link_custom_field_id is given.
+    """
+    tasks_api_instance = app.asana_tasks_api
 
-    body = {
+    body: dict[str, dict[str, Any]] = {
         "data": {
             "name": task.asana_title,
             "html_notes": f"<body>{task.asana_notes_link}</body>",
             "assignee": task.assigned_to,
-            "completed": task.state in _CLOSED_STATES,
+            "completed": is_task_completed(task),
         }
     }
 
@@ -751,14 +891,18 @@ def update_asana_task(
 
     try:
         # Update the asana task item.
-        result = tasks_api_instance.update_task(body, task.asana_gid, opts={})
+        # Request the tags with the update, so the tag check below does not need another call.
+        result = tasks_api_instance.update_task(
+            body, task.asana_gid, opts={"opt_fields": "modified_at,tags"}
+        )
         task.asana_updated = result["modified_at"]
-        task.updated_date = iso8601_utc(datetime.now())
         task.save(app)
         # Add the tag to the updated item if it does not already have it assigned.
-        tag_asana_item(app, task, tag)
+        tag_asana_item(app, task, tag, result.get("tags"))
+        return True
     except ApiException as exception:
         _LOGGER.error("Exception when calling TasksApi->update_task: %s\n", exception)
+        return False
 
 
 def get_asana_project_custom_fields(app: App, project_gid: str) -> list[dict]:
@@ -802,7 +946,7 @@ def get_asana_project_custom_fields(app: App, project_gid: str) -> list[dict]:
             )
             return []
     except Exception as e:
-        _LOGGER.error("An unexpected error occurred: %s", str(e))
+        _LOGGER.error("An unexpected error occurred: %s", e)
         return []
 
 
@@ -819,22 +963,11 @@ def find_custom_field_by_name(
     return None
 
 
-def get_asana_users(app: App, asana_workspace_gid: str) -> list[dict]:
+def get_link_custom_field_id(app: App, project_gid: str) -> str | None:
     """
-    Retrieves a list of Asana users in a specific workspace.
+    Returns the gid of the 'Link' custom field in the project, or None if the project does not have one.
     """
-    users_api_instance = asana.UsersApi(app.asana_client)
-    opts = {
-        "workspace": asana_workspace_gid,
-        "opt_fields": "email,name",
-    }
-
-    try:
-        api_response = users_api_instance.get_users(opts)
-        return list(api_response)
-    except ApiException as exception:
-        _LOGGER.error("Exception when calling UsersApi->get_users: %s\n", exception)
-        return []
-    except Exception as e:
-        _LOGGER.error("An unexpected error occurred: %s", str(e))
-        return []
+    link_custom_field = find_custom_field_by_name(app, project_gid, "Link")
+    if link_custom_field is None:
+        return None
+    return link_custom_field.get("custom_field", {}).get("gid")
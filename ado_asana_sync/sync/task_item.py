@@ -6,11 +6,15 @@ from __future__ import annotations
 from html import escape
 from typing import Any
 
-from tinydb import Query
+from tinydb import where
 
 from .app import App
 from .asana import get_asana_task
 
+# Field paths used to build TinyDB queries.
+_ADO_ID = where("ado_id")
+_ASANA_GID = where("asana_gid")
+
 
 class TaskItem:
     """
@@ -33,6 +37,21 @@ class TaskItem:
         state (str): The item state, for example New, Active, Closed.
     """
 
+    # Slots avoid a per-instance __dict__, as an item is created for every matched work item on each sync.
+    __slots__ = (
+        "ado_id",
+        "ado_rev",
+        "title",
+        "item_type",
+        "url",
+        "asana_gid",
+        "asana_updated",
+        "assigned_to",
+        "created_date",
+        "updated_date",
+        "state",
+    )
+
     def __init__(
         self,
         ado_id: int,
@@ -40,12 +59,12 @@ class TaskItem:
         title: str,
         item_type: str,
         url: str,
-        asana_gid: str = None,
-        asana_updated: str = None,
-        assigned_to: str = None,
-        created_date: str = None,
-        updated_date: str = None,
-        state: str = None,
+        asana_gid: str | None = None,
+        asana_updated: str | None = None,
+        assigned_to: str | None = None,
+        created_date: str | None = None,
+        updated_date: str | None = None,
+        state: str | None = None,
     ) -> None:
         self.ado_id = ado_id
         self.ado_rev = ado_rev
@@ -60,19 +79,33 @@ class TaskItem:
         self.state = state
 
     def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, TaskItem):
             return False
+        # Items for different work items never match, so compare the ADO ID before the remaining fields.
+        if self.ado_id != other.ado_id:
+            return False
         return (
-            self.ado_id == other.ado_id
-            and self.ado_rev == other.ado_rev
-            and self.title == other.title
-            and self.item_type == other.item_type
-            and self.url == other.url
-            and self.asana_gid == other.asana_gid
-            and self.asana_updated == other.asana_updated
-            and self.assigned_to == other.assigned_to
-            and self.created_date == other.created_date
-            and self.updated_date == other.updated_date
+            self.ado_rev,
+            self.title,
+            self.item_type,
+            self.url,
+            self.asana_gid,
+            self.asana_updated,
+            self.assigned_to,
+            self.created_date,
+            self.updated_date,
+        ) == (
+            other.ado_rev,
+            other.title,
+            other.item_type,
+            other.url,
+            other.asana_gid,
+            other.asana_updated,
+            other.assigned_to,
+            other.created_date,
+            other.updated_date,
         )
 
     def __str__(self) -> str:
@@ -104,6 +137,31 @@ class TaskItem:
         """
         return f'<a href="{self.url}">{self.item_type} {self.ado_id}</a>: {escape(self.title)}'
 
+    @classmethod
+    def from_record(cls, record: dict) -> TaskItem:
+        """
+        Create a TaskItem from a database record.
+
+        Args:
+            record (dict): The database record.
+
+        Returns:
+            TaskItem: The TaskItem populated from the record.
+        """
+        return cls(
+            record["ado_id"],
+            record["ado_rev"],
+            record["title"],
+            record["item_type"],
+            record["url"],
+            record.get("asana_gid"),
+            record.get("asana_updated"),
+            record.get("assigned_to"),
+            record.get("created_date"),
+            record.get("updated_date"),
+            record.get("state"),
+        )
+
     @classmethod
     def find_by_ado_id(cls, app: App, ado_id: int) -> TaskItem | None:
         """
@@ -117,15 +175,15 @@ class TaskItem:
             TaskItem: The TaskItem object with the matching ADO ID.
             None: If there is no matching item.
         """
-        query = Query().ado_id == ado_id
+        query = _ADO_ID == ado_id
         if app.matches.contains(query):
             item = app.matches.search(query)
-            return cls(**item[0])
+            return cls.from_record(item[0])
         return None
 
     @classmethod
     def search(
-        cls, app: App, ado_id: int = None, asana_gid: str = None
+        cls, app: App, ado_id: int | None = None, asana_gid: str | None = None
     ) -> TaskItem | None:
         """
         Search for a task item in the App object based on the given ADO ID or Asana GID.
@@ -142,13 +200,12 @@ class TaskItem:
             return None
 
         # Generate the query based on the input.
-        task = Query()
-        query = (task.ado_id == ado_id) | (task.asana_gid == asana_gid)
+        query = (_ADO_ID == ado_id) | (_ASANA_GID == asana_gid)
 
         # return the first matching item, or return None if not found.
         if app.matches.contains(query):
             item = app.matches.search(query)
-            return cls(**item[0])
+            return cls.from_record(item[0])
         return None
 
     def save(self, app: App) -> None:
@@ -174,15 +231,16 @@ class TaskItem:
             "created_date": self.created_date,
             "updated_date": self.updated_date,
         }
-        query = Query().ado_id == task_data["ado_id"]
-        if app.matches.contains(query):
-            with app.db_lock:
-                app.matches.update(task_data, query)
-        else:
-            with app.db_lock:
-                app.matches.insert(task_data)
+        with app.db_lock:
+            # Update every record for the work item, or insert one if there are none, in a single pass over the table.
+            app.matches.upsert(task_data, _ADO_ID == task_data["ado_id"])
 
-    def is_current(self, app: App) -> bool:
+    def is_current(
+        self,
+        app: App,
+        asana_tasks: dict[str, dict] | None = None,
+        ado_task: Any = None,
+    ) -> bool:
         """
         Check if the current TaskItem is up-to-date with its corresponding tasks in Azure DevOps (ADO) and Asana.
 
@@ -192,20 +250,31 @@ class TaskItem:
 
         Args:
             a (App): The App instance.
+            asana_tasks (dict, optional): Asana task dicts already fetched, keyed by gid. The task is only requested from
+                Asana when it is not in this dict, and is then added to it. Defaults to None.
+            ado_task (WorkItem, optional): The ADO work item if the caller has already fetched it. Defaults to None.
 
         Returns:
             bool: True if the TaskItem is current, False otherwise.
         """
-        ado_task = app.ado_wit_client.get_work_item(self.ado_id)
-        asana_task = get_asana_task(app, self.asana_gid)
-
-        if not ado_task or not asana_task:
+        if ado_task is None:
+            ado_task = app.ado_wit_client.get_work_item(self.ado_id)
+        # Check the ADO revision first, so Asana is only queried when the work item is unchanged.
+        if not ado_task or ado_task.rev != self.ado_rev:
             return False
+        # An item without an Asana task can not be current.
+        if self.asana_gid is None:
+            return False
+
+        if asana_tasks is None:
+            asana_tasks = {}
+        asana_task = asana_tasks.get(self.asana_gid)
+        if asana_task is None:
+            asana_task = get_asana_task(app, self.asana_gid)
+            if asana_task is not None:
+                asana_tasks[self.asana_gid] = asana_task
 
-        if (
-            ado_task.rev != self.ado_rev
-            or asana_task["modified_at"] != self.asana_updated
-        ):
+        if not asana_task or asana_task["modified_at"] != self.asana_updated:
             return False
 
         return True
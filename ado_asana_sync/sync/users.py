@@ -0,0 +1,100 @@
+""" Contains the functions used to match Azure DevOps (ADO) users to Asana users.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import asana  # type: ignore
+from asana.rest import ApiException  # type: ignore
+from azure.devops.v7_0.work_item_tracking.models import WorkItem  # type: ignore
+
+from ado_asana_sync.utils.logging_tracing import setup_logging_and_tracing
+
+from .app import App
+
+# This module uses the logger and tracer instances _LOGGER and _TRACER for logging and tracing, respectively.
+_LOGGER, _TRACER = setup_logging_and_tracing(__name__)
+
+
+@dataclass
+class ADOAssignedUser:
+    """
+    Class to store the details of the assigned user in ADO.
+    """
+
+    display_name: str
+    email: str
+
+
+def get_task_user(task: WorkItem) -> ADOAssignedUser | None:
+    """
+    Return the email and display name of the user assigned to the Azure DevOps work item.
+    If no user is assigned, then return None.
+    """
+    assigned_to = task.fields.get("System.AssignedTo", None)
+    if assigned_to is not None:
+        display_name = assigned_to.get("displayName", None)
+        email = assigned_to.get("uniqueName", None)
+        if display_name is None or email is None:
+            return None
+        return ADOAssignedUser(display_name, email)
+    return None
+
+
+def get_asana_users(app: App, asana_workspace_gid: str) -> list[dict]:
+    """
+    Retrieves a list of Asana users in a specific workspace.
+    """
+    users_api_instance = asana.UsersApi(app.asana_client)
+    opts = {
+        "workspace": asana_workspace_gid,
+        "opt_fields": "email,name",
+    }
+
+    try:
+        api_response = users_api_instance.get_users(opts)
+        return list(api_response)
+    except ApiException as exception:
+        _LOGGER.error("Exception when calling UsersApi->get_users: %s\n", exception)
+        return []
+    except Exception as e:
+        _LOGGER.error("An unexpected error occurred: %s", e)
+        return []
+
+
+def index_asana_users(
+    user_list: list[dict],
+) -> dict[tuple[str, str], tuple[int, dict]]:
+    """
+    Index a list of Asana users by lower-cased email and name, mapping each value to the position in the list and the user
+    dict of the first user with it.
+    """
+    user_index: dict[tuple[str, str], tuple[int, dict]] = {}
+    for position, user in enumerate(user_list):
+        for key in ("email", "name"):
+            value = (user.get(key) or "").lower()
+            if value:
+                user_index.setdefault((key, value), (position, user))
+    return user_index
+
+
+def find_indexed_user(
+    user_index: dict[tuple[str, str], tuple[int, dict]],
+    ado_user: ADOAssignedUser | None,
+) -> dict | None:
+    """
+    Returns the user from an index built by index_asana_users that matches either the email or the name of the ADO user. When
+    both match different users, the user that came first in the indexed list is returned.
+    """
+    if ado_user is None:
+        return None
+    matches = [
+        match
+        for match in (
+            user_index.get(("email", (ado_user.email or "").lower())),
+            user_index.get(("name", (ado_user.display_name or "").lower())),
+        )
+        if match is not None
+    ]
+    return min(matches, key=lambda match: match[0])[1] if matches else None
@@ -12,13 +12,18 @@ Example usage:
     _LOGGER, _TRACER = setup_logging_and_tracing(__name__)
 """
 import logging
+from functools import lru_cache
+
 from opentelemetry import trace
 
 
+@lru_cache(maxsize=None)
 def setup_logging_and_tracing(module_name: str):
     """
     Initializes the logger and tracer for the specified module.
 
+    The result is cached per module name, so repeated calls return the same logger and tracer without reconfiguring logging.
+
     Args:
         module_name (str): The name of the module to initialize the logger and tracer for.
 
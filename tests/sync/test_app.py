@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 import pytz
@@ -24,6 +24,8 @@ class TestApp(unittest.TestCase):
         assert app.ado_work_client is None
         assert app.ado_wit_client is None
         assert app.asana_client is None
+        assert app.asana_tags_api is None
+        assert app.asana_tasks_api is None
         assert app.asana_page_size == 100
 
     # Tests that the Asana page size is set correctly
@@ -37,3 +39,53 @@ class TestApp(unittest.TestCase):
         assert app.asana_page_size == 100
         app.asana_page_size = 50
         assert app.asana_page_size == 50
+
+    # Tests that the Asana connection pool size is left to the SDK by default
+    def test_asana_pool_maxsize_default(self):
+        app = App(
+            ado_pat="ado_pat",
+            ado_url="ado_url",
+            asana_token="asana_token",
+            asana_workspace_name="asana_workspace_name",
+        )
+        assert app.asana_pool_maxsize is None
+
+    # Tests that connect sizes the Asana connection pool for the sync threads unless a size is set
+    @patch("ado_asana_sync.sync.app.TinyDB")
+    @patch("ado_asana_sync.sync.app.configure_azure_monitor")
+    @patch("ado_asana_sync.sync.app.Connection")
+    @patch("ado_asana_sync.sync.app.asana")
+    def test_connect_asana_pool_maxsize(self, mock_asana, *_):
+        app = App(
+            ado_pat="ado_pat",
+            ado_url="ado_url",
+            asana_token="asana_token",
+            asana_workspace_name="asana_workspace_name",
+        )
+        app.thread_count = 8
+        asana_config = mock_asana.Configuration.return_value
+        asana_config.connection_pool_maxsize = 40
+        app.connect()
+        assert asana_config.connection_pool_maxsize == 40
+
+        asana_config.connection_pool_maxsize = 10
+        app.connect()
+        assert asana_config.connection_pool_maxsize == 16
+
+        app.asana_pool_maxsize = 4
+        app.connect()
+        assert asana_config.connection_pool_maxsize == 4
+        mock_asana.ApiClient.assert_called_with(asana_config)
+
+    # Tests that flush_db writes the cached database to disk
+    def test_flush_db(self):
+        app = App(
+            ado_pat="ado_pat",
+            ado_url="ado_url",
+            asana_token="asana_token",
+            asana_workspace_name="asana_workspace_name",
+        )
+        app.flush_db()
+        app.db = MagicMock()
+        app.flush_db()
+        app.db.storage.flush.assert_called_once()
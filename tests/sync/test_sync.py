@@ -1,16 +1,37 @@
+import contextvars
 import unittest
-from unittest.mock import MagicMock
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
 
-from azure.devops.v7_0.work_item_tracking.models import WorkItem
+from azure.devops.exceptions import AzureDevOpsServiceError
+from tinydb.table import Document
 
 from ado_asana_sync.sync.sync import (
-    ADOAssignedUser,
-    get_task_user,
-    matching_user,
-    get_asana_task_by_name,
+    ASANA_PROJECT_GID_CACHE,
+    ASANA_WORKSPACE_GID_CACHE,
+    CUSTOM_FIELDS_CACHE,
+    apply_ado_changes,
+    create_asana_task,
+    create_tag_if_not_existing,
+    get_ado_work_items,
+    get_asana_project,
+    get_asana_project_tasks,
+    get_asana_workspace,
+    get_link_custom_field_id,
+    get_project_ids,
+    index_asana_tasks_by_name,
+    is_item_older_than_threshold,
+    process_closed_items,
+    remove_mappings,
+    resolve_asana_gids,
+    start_sync,
+    sync_project,
+    tag_asana_item,
 )
 from ado_asana_sync.sync.task_item import TaskItem
 
+TEST_CONTEXT = contextvars.ContextVar("test_context", default=None)
+
 
 class TestTaskItem(unittest.TestCase):
     def setUp(self) -> None:
@@ -86,311 +107,762 @@ class TestTaskItem(unittest.TestCase):
         self.assertEqual(work_item_obj.asana_title, "True invalid: 123")
 
 
-class TestGetTaskUserEmail(unittest.TestCase):
-    # Tests that the function returns the email address of the user assigned to the work item when the System.AssignedTo field has a uniqueName
-    def test_assigned_user_with_uniqueName(self):
-        task = WorkItem()
-        task.fields = {
-            "System.AssignedTo": {
-                "uniqueName": "john.doe@example.com",
-                "displayName": "John Doe",
-            }
-        }
-        ado_user = ADOAssignedUser(
-            display_name="John Doe", email="john.doe@example.com"
-        )
-        result = get_task_user(task)
-        self.assertEqual(result, ado_user)
-
-    # Tests that the function returns None when the System.AssignedTo field is not present in the work item
-    def test_no_assigned_user(self):
-        task = WorkItem()
-        task.fields = {}
-        result = get_task_user(task)
-        self.assertIsNone(result)
+class TestIndexAsanaTasksByName(unittest.TestCase):
+    def test_task_found(self):
+        """
+        Test case for verifying that a task can be found by name.
+        """
 
-    # Tests that the function returns None when the System.AssignedTo field is present but does not have a uniqueName field
-    def test_missing_uniqueName(self):
-        task = WorkItem()
-        task.fields = {"System.AssignedTo": {}}
-        result = get_task_user(task)
-        self.assertIsNone(result)
+        task_list = [
+            {"name": "Task 1", "gid": "1"},
+            {"name": "Task 2", "gid": "2"},
+            {"name": "Task 3", "gid": "3"},
+        ]
 
-    # Tests that the function returns the email address even if the uniqueName field in the System.AssignedTo field is not a valid email address
-    def test_invalid_email_address(self):
-        task = WorkItem()
-        task.fields = {
-            "System.AssignedTo": {
-                "uniqueName": "john.doe",
-                "displayName": "John Doe",
-            }
-        }
-        ado_user = ADOAssignedUser(display_name="John Doe", email="john.doe")
-        result = get_task_user(task)
-        self.assertEqual(result, ado_user)
-
-    # Tests that the function returns None when the System.AssignedTo field is present but is None
-    def test_assigned_user_is_None(self):
-        task = WorkItem()
-        task.fields = {"System.AssignedTo": None}
-        result = get_task_user(task)
-        self.assertIsNone(result)
+        # Call the function being tested
+        result = index_asana_tasks_by_name(task_list).get("Task 1")
 
+        # Assert that the result is the task dictionary
+        self.assertEqual(result, {"name": "Task 1", "gid": "1"})
 
-class TestMatchingUser(unittest.TestCase):
-    # Tests that matching_user returns the matching user when the email exists in the user_list.
-    def test_matching_user_matching_email_exists(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
-        ]
-        ado_user = ADOAssignedUser(display_name="User Two", email="user2@example.com")
+    def test_task_not_found(self):
+        """
+        Test case for the scenario where the task is not found in the task list.
+        """
 
-        result = matching_user(user_list, ado_user)
+        task_list = [{"name": "Task 1"}]
 
-        self.assertEqual(result, {"email": "user2@example.com", "name": "User 2"})
+        # Call the function being tested
+        result = index_asana_tasks_by_name(task_list).get("Task 2")
 
-    # Tests that matching_user returns the matching user when the display name exists in the user_list.
-    def test_matching_user_matching_display_name_exists(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
+        # Assert that the result is None
+        self.assertIsNone(result)
+
+    def test_first_task_wins(self):
+        task_list = [
+            {"name": "Task 1", "gid": "1"},
+            {"name": "Task 2", "gid": "2"},
+            {"name": "Task 1", "gid": "3"},
         ]
-        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.co.uk")
 
-        result = matching_user(user_list, ado_user)
+        result = index_asana_tasks_by_name(task_list)
 
-        self.assertEqual(result, {"email": "user2@example.com", "name": "User 2"})
+        self.assertEqual(result["Task 1"], {"name": "Task 1", "gid": "1"})
+        self.assertEqual(result["Task 2"], {"name": "Task 2", "gid": "2"})
 
-    # Tests that matching_user returns None when the email does not exist in the user_list.
-    def test_matching_user_matching_email_does_not_exist(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
-        ]
-        ado_user = ADOAssignedUser(display_name="User 4", email="user4@example.com")
 
-        result = matching_user(user_list, ado_user)
+class TestRemoveMappings(unittest.TestCase):
+    def _item(self, doc_id):
+        return Document(
+            {"ado_id": doc_id, "item_type": "Bug", "title": f"Item {doc_id}"},
+            doc_id=doc_id,
+        )
 
-        self.assertIsNone(result)
+    # Tests that all expired items are removed with a single database call.
+    def test_removes_items_in_one_call(self):
+        app = MagicMock()
+        app.matches.contains.return_value = True
 
-    # Tests that matching_user returns None when the user_list is empty.
-    def test_matching_user_user_list_empty(self):
-        user_list = []
-        ado_user = ADOAssignedUser(display_name="User 1", email="user1@example.com")
+        remove_mappings(app, [self._item(1), self._item(2)])
 
-        result = matching_user(user_list, ado_user)
+        app.matches.remove.assert_called_once_with(doc_ids=[1, 2])
 
-        self.assertIsNone(result)
+    # Tests that items already removed from the database are skipped.
+    def test_skips_missing_items(self):
+        app = MagicMock()
+        app.matches.contains.side_effect = lambda doc_id: doc_id != 1
 
-    # Tests that matching_user returns None when the email is an empty string.
-    def test_matching_user_email_empty(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
-        ]
-        ado_user = ADOAssignedUser(display_name="", email="")
+        remove_mappings(app, [self._item(1), self._item(2)])
 
-        result = matching_user(user_list, ado_user)
+        app.matches.remove.assert_called_once_with(doc_ids=[2])
 
-        self.assertIsNone(result)
+    # Tests that the database is not touched when there is nothing to remove.
+    def test_no_items(self):
+        app = MagicMock()
 
-    # Tests that matching_user returns the user when the user_list contains only one user and the email matches that user's email.
-    def test_matching_user_user_list_contains_one_user_email_matches(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-        ]
-        ado_user = ADOAssignedUser(display_name="User 1", email="user1@example.com")
+        remove_mappings(app, [])
 
-        result = matching_user(user_list, ado_user)
+        app.matches.remove.assert_not_called()
 
-        self.assertEqual(result, {"email": "user1@example.com", "name": "User 1"})
 
-    # Tests that matching_user returns None when the user_list contains only one user and the email does not match that user's email.
-    def test_matching_user_user_list_contains_one_user_email_does_not_match(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
+class TestGetAdoWorkItems(unittest.TestCase):
+    def test_requests_items_in_batches(self):
+        app = MagicMock()
+        app.ado_wit_client.get_work_items.side_effect = lambda ids, **kwargs: [
+            MagicMock(id=i) for i in ids
         ]
-        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.com")
 
-        result = matching_user(user_list, ado_user)
+        result = get_ado_work_items(app, list(range(450)))
 
-        self.assertIsNone(result)
-
-    # Tests that matching_user returns None when the ado_user is None.
-    def test_matching_user_ado_user_none(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
+        self.assertEqual([wi.id for wi in result], list(range(450)))
+        batches = [
+            call.args[0] for call in app.ado_wit_client.get_work_items.call_args_list
         ]
-        ado_user = None
+        self.assertEqual([len(batch) for batch in batches], [200, 200, 50])
 
-        result = matching_user(user_list, ado_user)  # NOSONAR
+    def test_requests_each_id_once(self):
+        app = MagicMock()
+        app.ado_wit_client.get_work_items.return_value = []
 
-        self.assertIsNone(result)
+        get_ado_work_items(app, [3, 1, 3, 2, 1])
 
+        self.assertEqual(app.ado_wit_client.get_work_items.call_args.args[0], [3, 1, 2])
 
-class TestGetAsanaTaskByName(unittest.TestCase):
-    def test_task_found(self):
-        """
-        Test case for verifying that a task can be found by name.
-        """
+    def test_omits_missing_items(self):
+        app = MagicMock()
+        found = MagicMock(id=1)
+        app.ado_wit_client.get_work_items.return_value = [found, None]
 
-        task_list = [
-            {"name": "Task 1", "gid": "1"},
-            {"name": "Task 2", "gid": "2"},
-            {"name": "Task 3", "gid": "3"},
+        self.assertEqual(get_ado_work_items(app, [1, 2]), [found])
+
+    def test_no_ids(self):
+        app = MagicMock()
+
+        self.assertEqual(get_ado_work_items(app, []), [])
+        app.ado_wit_client.get_work_items.assert_not_called()
+
+    @patch("ado_asana_sync.sync.sync._LOGGER")
+    def test_failed_batch_is_skipped(self, mock_logger):
+        app = MagicMock()
+        found = MagicMock(id=201)
+        app.ado_wit_client.get_work_items.side_effect = [
+            AzureDevOpsServiceError(
+                MagicMock(inner_exception=None, message="Service unavailable")
+            ),
+            [found],
         ]
 
-        # Call the function being tested
-        result = get_asana_task_by_name(task_list, "Task 1")
+        self.assertEqual(get_ado_work_items(app, list(range(201))), [found])
+        mock_logger.error.assert_called_once()
 
-        # Assert that the result is the task dictionary
-        self.assertEqual(result, {"name": "Task 1", "gid": "1"})
 
-    def test_task_not_found(self):
-        """
-        Test case for the scenario where the task is not found in the task list.
-        """
+class TestTagAsanaItem(unittest.TestCase):
+    def setUp(self) -> None:
+        self.task = TaskItem(
+            ado_id=1,
+            ado_rev=1,
+            title="Test Title",
+            item_type="Task",
+            url="https://example.com",
+            asana_gid="123",
+        )
 
-        task_list = [{"name": "Task 1"}]
+    @patch("ado_asana_sync.sync.sync.get_asana_task_tags")
+    def test_uses_given_tags(self, mock_get_asana_task_tags):
+        app = MagicMock()
 
-        # Call the function being tested
-        result = get_asana_task_by_name(task_list, "Task 2")
+        tag_asana_item(app, self.task, "456", [{"gid": "456"}])
 
-        # Assert that the result is None
-        self.assertIsNone(result)
+        mock_get_asana_task_tags.assert_not_called()
+        app.asana_tasks_api.add_tag_for_task.assert_not_called()
 
+    @patch("ado_asana_sync.sync.sync.get_asana_task_tags")
+    def test_fetches_tags_when_not_given(self, mock_get_asana_task_tags):
+        app = MagicMock()
+        mock_get_asana_task_tags.return_value = []
 
-class TestMatchingUser(unittest.TestCase):
-    # Tests that matching_user returns the matching user when the email exists in the user_list.
-    def test_matching_user_matching_email_exists(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
-        ]
-        ado_user = ADOAssignedUser(display_name="User Two", email="user2@example.com")
+        tag_asana_item(app, self.task, "456")
 
-        result = matching_user(user_list, ado_user)
+        mock_get_asana_task_tags.assert_called_once()
+        app.asana_tasks_api.add_tag_for_task.assert_called_once_with(
+            {"data": {"tag": "456"}}, "123"
+        )
 
-        self.assertEqual(result, {"email": "user2@example.com", "name": "User 2"})
 
-    # Tests that matching_user returns the matching user when the display name exists in the user_list.
-    def test_matching_user_matching_display_name_exists(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
+class TestProcessClosedItems(unittest.TestCase):
+    def setUp(self) -> None:
+        self.project = {"adoProjectName": "ADO Project"}
+
+    def _record(self, ado_id):
+        return {
+            "ado_id": ado_id,
+            "ado_rev": 1,
+            "title": "Test Title",
+            "item_type": "Task",
+            "url": "https://example.com",
+            "asana_gid": str(ado_id),
+            "updated_date": "2999-01-01T00:00:00+00:00",
+        }
+
+    @patch("ado_asana_sync.sync.sync.update_task_if_needed")
+    def test_fetches_closed_items_in_one_call(self, mock_update_task_if_needed):
+        app = MagicMock()
+        changed = MagicMock(id=2, rev=2)
+        app.ado_wit_client.get_work_items.return_value = [changed]
+        all_tasks = [self._record(1), self._record(2), self._record(3)]
+
+        process_closed_items(app, self.project, all_tasks, {1}, MagicMock())
+
+        app.ado_wit_client.get_work_items.assert_called_once()
+        self.assertEqual(app.ado_wit_client.get_work_items.call_args.args[0], [2, 3])
+        app.ado_wit_client.get_work_item.assert_not_called()
+        mock_update_task_if_needed.assert_called_once()
+        self.assertIs(mock_update_task_if_needed.call_args.args[1], changed)
+
+    @patch("ado_asana_sync.sync.sync.update_task_if_needed")
+    def test_duplicate_records_checked_once(self, mock_update_task_if_needed):
+        app = MagicMock()
+        app.ado_wit_client.get_work_items.return_value = [MagicMock(id=2, rev=2)]
+        all_tasks = [self._record(2), self._record(2)]
+
+        process_closed_items(app, self.project, all_tasks, set(), MagicMock())
+
+        self.assertEqual(app.ado_wit_client.get_work_items.call_args.args[0], [2])
+        mock_update_task_if_needed.assert_called_once()
+
+    @patch("ado_asana_sync.sync.sync._LOGGER")
+    def test_all_items_processed(self, mock_logger):
+        app = MagicMock()
+
+        process_closed_items(app, self.project, [self._record(1)], {1}, MagicMock())
+
+        app.ado_wit_client.get_work_items.assert_not_called()
+        mock_logger.info.assert_not_called()
+
+    @patch.object(
+        TaskItem, "is_current", side_effect=lambda _app, _tasks, wi: wi.id == 2
+    )
+    @patch("ado_asana_sync.sync.sync.update_task_if_needed")
+    @patch("ado_asana_sync.sync.sync._LOGGER")
+    def test_summary_counts(self, mock_logger, mock_update_task_if_needed, _):
+        app = MagicMock()
+        app.ado_wit_client.get_work_items.return_value = [
+            MagicMock(id=ado_id) for ado_id in (2, 3, 4)
         ]
-        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.co.uk")
+        # Item 3 is updated in Asana, the update for item 4 is skipped.
+        mock_update_task_if_needed.side_effect = lambda _app, wi, *_: wi.id == 3
+        expired = Document(
+            {**self._record(5), "updated_date": "2000-01-01T00:00:00+00:00"}, doc_id=5
+        )
+        all_tasks = [self._record(ado_id) for ado_id in (1, 2, 3, 4)] + [expired]
+
+        process_closed_items(app, self.project, all_tasks, set(), MagicMock())
+
+        self.assertEqual(mock_update_task_if_needed.call_count, 2)
+        mock_logger.info.assert_any_call(
+            "closed items for project %s: %s up to date, %s updated, %s not found, %s expired",
+            "ADO Project",
+            1,
+            1,
+            1,
+            1,
+        )
 
-        result = matching_user(user_list, ado_user)
 
-        self.assertEqual(result, {"email": "user2@example.com", "name": "User 2"})
+class TestIsItemOlderThanThreshold(unittest.TestCase):
+    def test_compares_against_cutoff(self):
+        cutoff = "2024-01-01T00:00:00+00:00"
 
-    # Tests that matching_user returns the matching user when the email exists in another case in the user_list.
-    def test_matching_user_matching_email_exists_other_case(self):
-        user_list = [
-            {"email": "USER1@EXAMPLE.COM", "name": "USER 1"},
-            {"email": "USER2@EXAMPLE.COM", "name": "USER 2"},
-            {"email": "USER3@EXAMPLE.COM", "name": "USER 3"},
-        ]
-        ado_user = ADOAssignedUser(display_name="User Two", email="user2@example.com")
+        self.assertTrue(
+            is_item_older_than_threshold(
+                {"updated_date": "2023-12-31T23:59:59.999999+00:00"}, cutoff
+            )
+        )
+        self.assertFalse(
+            is_item_older_than_threshold(
+                {"updated_date": "2024-01-01T00:00:00.000001+00:00"}, cutoff
+            )
+        )
 
-        result = matching_user(user_list, ado_user)
+    def test_default_cutoff(self):
+        self.assertTrue(
+            is_item_older_than_threshold({"updated_date": "2000-01-01T00:00:00+00:00"})
+        )
+        self.assertFalse(
+            is_item_older_than_threshold({"updated_date": "2999-01-01T00:00:00+00:00"})
+        )
 
-        self.assertEqual(result, {"email": "USER2@EXAMPLE.COM", "name": "USER 2"})
 
-    # Tests that matching_user returns the matching user when the display name exists in another case in the user_list.
-    def test_matching_user_matching_display_name_exists_other_case(self):
-        user_list = [
-            {"email": "USER1@EXAMPLE.COM", "name": "USER 1"},
-            {"email": "USER2@EXAMPLE.COM", "name": "USER 2"},
-            {"email": "USER3@EXAMPLE.COM", "name": "USER 3"},
-        ]
-        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.co.uk")
+class TestCreateTagIfNotExisting(unittest.TestCase):
+    @patch("ado_asana_sync.sync.sync.get_tag_by_name")
+    def test_existing_tag_gid_is_stored_in_first_config_document(
+        self, mock_get_tag_by_name
+    ):
+        app = MagicMock()
+        app.config.get.return_value = None
+        mock_get_tag_by_name.return_value = {"gid": "123"}
 
-        result = matching_user(user_list, ado_user)
+        self.assertEqual(create_tag_if_not_existing(app, "1", "synced"), "123")
 
-        self.assertEqual(result, {"email": "USER2@EXAMPLE.COM", "name": "USER 2"})
+        stored = app.config.upsert.call_args.args[0]
+        self.assertEqual(stored, {"tag_gid": "123"})
+        self.assertEqual(stored.doc_id, 1)
 
-    # Tests that matching_user returns None when the email does not exist in the user_list.
-    def test_matching_user_matching_email_does_not_exist(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
-        ]
-        ado_user = ADOAssignedUser(display_name="User 4", email="user4@example.com")
 
-        result = matching_user(user_list, ado_user)
+class TestGetProjectIds(unittest.TestCase):
+    @patch("ado_asana_sync.sync.sync._LOGGER")
+    def test_ado_project_not_found(self, mock_logger):
+        app = MagicMock()
+        error = AzureDevOpsServiceError(
+            MagicMock(inner_exception=None, message="Project not found")
+        )
+        app.ado_core_client.get_project.side_effect = error
+        project = {"adoProjectName": "Missing", "adoTeamName": "Team"}
 
-        self.assertIsNone(result)
+        with self.assertRaises(AzureDevOpsServiceError):
+            get_project_ids(app, project)
 
-    # Tests that matching_user returns None when the user_list is empty.
-    def test_matching_user_user_list_empty(self):
-        user_list = []
-        ado_user = ADOAssignedUser(display_name="User 1", email="user1@example.com")
+        mock_logger.error.assert_called_once_with(
+            "ADO project %s not found: %s", "Missing", error
+        )
+        app.ado_core_client.get_team.assert_not_called()
 
-        result = matching_user(user_list, ado_user)
 
-        self.assertIsNone(result)
+class TestGetAsanaProjectTasks(unittest.TestCase):
+    def test_reads_all_pages_from_one_call(self):
+        app = MagicMock()
+        app.asana_page_size = 2
+        tasks = [{"gid": "1"}, {"gid": "2"}, {"gid": "3"}]
+        app.asana_tasks_api.get_tasks.return_value = iter(tasks)
+
+        result = get_asana_project_tasks(app, "123")
+
+        self.assertEqual(result, tasks)
+        app.asana_tasks_api.get_tasks.assert_called_once()
+
+
+class TestGetLinkCustomFieldId(unittest.TestCase):
+    @patch("ado_asana_sync.sync.sync.find_custom_field_by_name")
+    def test_link_field_found(self, mock_find_custom_field_by_name):
+        mock_find_custom_field_by_name.return_value = {
+            "custom_field": {"gid": "789", "name": "Link"}
+        }
+
+        self.assertEqual(get_link_custom_field_id(MagicMock(), "123"), "789")
+
+    @patch("ado_asana_sync.sync.sync.find_custom_field_by_name")
+    def test_link_field_not_found(self, mock_find_custom_field_by_name):
+        mock_find_custom_field_by_name.return_value = None
+
+        self.assertIsNone(get_link_custom_field_id(MagicMock(), "123"))
+
+
+class TestCreateAsanaTask(unittest.TestCase):
+    def test_closed_item_is_created_completed(self):
+        app = MagicMock()
+        app.asana_tasks_api.create_task.return_value = {
+            "gid": "123",
+            "modified_at": "2023-08-01T00:00:00+00:00",
+        }
+        task = TaskItem(
+            ado_id=1,
+            ado_rev=1,
+            title="Test Title",
+            item_type="Task",
+            url="https://example.com",
+            state="Closed",
+        )
+
+        create_asana_task(app, "456", task, "789", "321")
+
+        body = app.asana_tasks_api.create_task.call_args.args[0]
+        self.assertTrue(body["data"]["completed"])
+        self.assertNotIn("state", body["data"])
+        self.assertEqual(body["data"]["custom_fields"], {"321": "https://example.com"})
+        self.assertEqual(task.asana_gid, "123")
+
+
+class TestApplyAdoChanges(unittest.TestCase):
+    def setUp(self) -> None:
+        self.existing_match = TaskItem(
+            ado_id=1,
+            ado_rev=1,
+            title="Test Title",
+            item_type="Task",
+            url="https://example.com",
+            asana_gid="123",
+            asana_updated="2023-08-01T00:00:00+00:00",
+            assigned_to="456",
+            state="Active",
+        )
+        self.ado_task = MagicMock(rev=2)
+        self.ado_task.fields = {
+            "System.Title": "Test Title",
+            "System.WorkItemType": "Task",
+            "System.State": "Active",
+        }
+        self.ado_task._links.additional_properties = {
+            "html": {"href": "https://example.com"}
+        }
+        self.context = MagicMock(sync_time="2023-08-02T00:00:00+00:00")
+
+    @patch("ado_asana_sync.sync.sync.update_asana_task")
+    def test_skips_update_when_nothing_changed(self, mock_update_asana_task):
+        app = MagicMock()
+        asana_task = {"modified_at": "2023-08-01T00:00:00+00:00"}
+        self.context.asana_tasks_by_gid = {"123": asana_task}
+
+        result = apply_ado_changes(
+            app,
+            self.ado_task,
+            self.existing_match,
+            {"gid": "456"},
+            self.context,
+        )
+
+        self.assertFalse(result)
+        mock_update_asana_task.assert_not_called()
+        self.assertEqual(self.existing_match.ado_rev, 2)
+        app.matches.update.assert_not_called()
+        app.matches.upsert.assert_called_once()
+
+    @patch("ado_asana_sync.sync.sync.update_asana_task")
+    def test_updates_when_title_changed(self, mock_update_asana_task):
+        self.ado_task.fields["System.Title"] = "New Title"
+        asana_task = {"modified_at": "2023-08-01T00:00:00+00:00"}
+        self.context.asana_tasks_by_gid = {"123": asana_task}
+
+        apply_ado_changes(
+            MagicMock(),
+            self.ado_task,
+            self.existing_match,
+            {"gid": "456"},
+            self.context,
+        )
+
+        mock_update_asana_task.assert_called_once()
+
+    @patch("ado_asana_sync.sync.sync.update_asana_task")
+    def test_updates_when_asana_task_modified(self, mock_update_asana_task):
+        asana_task = {"modified_at": "2023-08-03T00:00:00+00:00"}
+        self.context.asana_tasks_by_gid = {"123": asana_task}
+
+        apply_ado_changes(
+            MagicMock(),
+            self.ado_task,
+            self.existing_match,
+            {"gid": "456"},
+            self.context,
+        )
+
+        mock_update_asana_task.assert_called_once()
+
+    @patch("ado_asana_sync.sync.sync.get_asana_task", return_value=None)
+    @patch("ado_asana_sync.sync.sync.update_asana_task")
+    def test_skips_missing_asana_task(self, mock_update_asana_task, _):
+        app = MagicMock()
+        self.context.asana_tasks_by_gid = {}
+
+        apply_ado_changes(
+            app, self.ado_task, self.existing_match, {"gid": "456"}, self.context
+        )
+
+        mock_update_asana_task.assert_not_called()
+        app.matches.upsert.assert_not_called()
+        self.assertEqual(self.existing_match.ado_rev, 1)
 
-    # Tests that matching_user returns None when the email is an empty string.
-    def test_matching_user_email_empty(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
+
+class TestAsanaGidCache(unittest.TestCase):
+    def setUp(self) -> None:
+        ASANA_WORKSPACE_GID_CACHE.clear()
+        ASANA_PROJECT_GID_CACHE.clear()
+
+    def tearDown(self) -> None:
+        ASANA_WORKSPACE_GID_CACHE.clear()
+        ASANA_PROJECT_GID_CACHE.clear()
+
+    @patch("ado_asana_sync.sync.sync.asana")
+    def test_workspace_gid_is_cached(self, mock_asana):
+        app = MagicMock()
+        mock_asana.WorkspacesApi.return_value.get_workspaces.return_value = [
+            {"name": "Workspace", "gid": "1"}
         ]
-        ado_user = ADOAssignedUser(display_name="", email="")
 
-        result = matching_user(user_list, ado_user)
+        self.assertEqual(get_asana_workspace(app, "Workspace"), "1")
+        self.assertEqual(get_asana_workspace(app, "Workspace"), "1")
 
-        self.assertIsNone(result)
+        mock_asana.WorkspacesApi.return_value.get_workspaces.assert_called_once()
+
+    @patch("ado_asana_sync.sync.sync.asana")
+    def test_project_not_found_is_not_cached(self, mock_asana):
+        app = MagicMock()
+        mock_asana.ProjectsApi.return_value.get_projects.return_value = []
+
+        for _ in range(2):
+            with self.assertRaises(NameError):
+                get_asana_project(app, "1", "Project")
+
+        self.assertEqual(mock_asana.ProjectsApi.return_value.get_projects.call_count, 2)
 
-    # Tests that matching_user returns the user when the user_list contains only one user and the email matches that user's email.
-    def test_matching_user_user_list_contains_one_user_email_matches(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
+    @patch("ado_asana_sync.sync.sync.asana")
+    def test_project_listing_caches_all_projects(self, mock_asana):
+        app = MagicMock()
+        mock_asana.ProjectsApi.return_value.get_projects.return_value = [
+            {"name": "Project A", "gid": "10"},
+            {"name": "Project B", "gid": "20"},
         ]
-        ado_user = ADOAssignedUser(display_name="User 1", email="user1@example.com")
 
-        result = matching_user(user_list, ado_user)
+        self.assertEqual(get_asana_project(app, "1", "Project A"), "10")
+        self.assertEqual(get_asana_project(app, "1", "Project B"), "20")
+
+        mock_asana.ProjectsApi.return_value.get_projects.assert_called_once()
+
+
+class TestResolveAsanaGids(unittest.TestCase):
+    @patch("ado_asana_sync.sync.sync.get_asana_project")
+    @patch("ado_asana_sync.sync.sync.get_asana_workspace", return_value="1")
+    def test_missing_project_does_not_stop_lookups(
+        self, _mock_get_asana_workspace, mock_get_asana_project
+    ):
+        app = MagicMock()
+        mock_get_asana_project.side_effect = [NameError("Missing"), "3"]
+
+        resolve_asana_gids(
+            app, [{"asanaProjectName": "Missing"}, {"asanaProjectName": "Found"}]
+        )
+
+        mock_get_asana_project.assert_any_call(app, "1", "Missing")
+        mock_get_asana_project.assert_any_call(app, "1", "Found")
+
+    @patch("ado_asana_sync.sync.sync.get_asana_project")
+    @patch(
+        "ado_asana_sync.sync.sync.get_asana_workspace",
+        side_effect=NameError("Missing"),
+    )
+    def test_missing_workspace_skips_project_lookups(
+        self, _mock_get_asana_workspace, mock_get_asana_project
+    ):
+        resolve_asana_gids(MagicMock(), [{"asanaProjectName": "Found"}])
+
+        mock_get_asana_project.assert_not_called()
 
-        self.assertEqual(result, {"email": "user1@example.com", "name": "User 1"})
 
-    # Tests that matching_user returns None when the user_list contains only one user and the email does not match that user's email.
-    def test_matching_user_user_list_contains_one_user_email_does_not_match(
+class TestSyncProject(unittest.TestCase):
+    @patch("ado_asana_sync.sync.sync.process_closed_items")
+    @patch("ado_asana_sync.sync.sync.process_backlog_items")
+    @patch("ado_asana_sync.sync.sync.get_link_custom_field_id")
+    @patch("ado_asana_sync.sync.sync.get_asana_project_tasks")
+    @patch("ado_asana_sync.sync.sync.get_asana_users")
+    @patch("ado_asana_sync.sync.sync.get_project_ids")
+    def test_fetches_in_caller_context(
         self,
+        mock_get_project_ids,
+        mock_get_asana_users,
+        mock_get_asana_project_tasks,
+        _mock_get_link_custom_field_id,
+        mock_process_backlog_items,
+        mock_process_closed_items,
     ):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
+        app = MagicMock()
+        app.matches.all.return_value = []
+        mock_get_project_ids.return_value = (
+            MagicMock(id="p"),
+            MagicMock(id="t"),
+            "1",
+            "2",
+        )
+        mock_get_asana_users.side_effect = lambda *_: [
+            {"gid": "u", "email": TEST_CONTEXT.get()}
         ]
-        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.com")
+        mock_get_asana_project_tasks.side_effect = lambda *_: [
+            {"gid": "a", "name": TEST_CONTEXT.get()}
+        ]
+        ado_items = MagicMock(work_items=[MagicMock(target=MagicMock(id=5))])
+        app.ado_work_client.get_backlog_level_work_items.side_effect = lambda *_: (
+            ado_items if TEST_CONTEXT.get() == "sync" else None
+        )
+        token = TEST_CONTEXT.set("sync")
+        self.addCleanup(TEST_CONTEXT.reset, token)
+
+        sync_project(
+            app,
+            {
+                "adoProjectName": "ADO Project",
+                "adoTeamName": "ADO Team",
+                "asanaProjectName": "Asana Project",
+            },
+        )
+
+        mock_get_asana_users.assert_called_once_with(app, "1")
+        mock_get_asana_project_tasks.assert_called_once_with(app, "2")
+        self.assertIs(mock_process_backlog_items.call_args.args[1], ado_items)
+        context = mock_process_backlog_items.call_args.args[2]
+        self.assertEqual(
+            context.asana_users_index[("email", "sync")],
+            (0, {"gid": "u", "email": "sync"}),
+        )
+        self.assertEqual(context.asana_tasks_by_gid["a"]["name"], "sync")
+        self.assertEqual(mock_process_closed_items.call_args.args[3], {5})
+
+    @patch("ado_asana_sync.sync.sync.process_closed_items")
+    @patch("ado_asana_sync.sync.sync.process_backlog_items")
+    @patch("ado_asana_sync.sync.sync.get_link_custom_field_id")
+    @patch("ado_asana_sync.sync.sync.get_project_items")
+    @patch("ado_asana_sync.sync.sync.get_project_ids")
+    def test_closed_items_read_after_backlog(
+        self,
+        mock_get_project_ids,
+        mock_get_project_items,
+        _mock_get_link_custom_field_id,
+        mock_process_backlog_items,
+        mock_process_closed_items,
+    ):
+        app = MagicMock()
+        before = {"ado_id": 1, "ado_rev": 1}
+        after = {"ado_id": 1, "ado_rev": 2}
+        app.matches.all.side_effect = [[before], [after]]
+        mock_get_project_ids.return_value = (MagicMock(), MagicMock(), "1", "2")
+        mock_get_project_items.return_value = ([], [], MagicMock(work_items=[]))
+
+        sync_project(
+            app,
+            {
+                "adoProjectName": "ADO Project",
+                "adoTeamName": "ADO Team",
+                "asanaProjectName": "Asana Project",
+            },
+        )
 
-        result = matching_user(user_list, ado_user)
+        context = mock_process_backlog_items.call_args.args[2]
+        self.assertEqual(context.matches_by_ado_id, {1: before})
+        self.assertEqual(mock_process_closed_items.call_args.args[2], [after])
+
+    @patch("ado_asana_sync.sync.sync.process_backlog_items")
+    @patch("ado_asana_sync.sync.sync.get_asana_users")
+    @patch("ado_asana_sync.sync.sync.get_project_ids")
+    def test_stops_when_asana_project_not_found(
+        self, mock_get_project_ids, mock_get_asana_users, mock_process_backlog_items
+    ):
+        mock_get_project_ids.return_value = (MagicMock(), MagicMock(), "1", None)
+
+        sync_project(
+            MagicMock(),
+            {
+                "adoProjectName": "ADO Project",
+                "adoTeamName": "ADO Team",
+                "asanaProjectName": "Asana Project",
+            },
+        )
+
+        mock_get_asana_users.assert_not_called()
+        mock_process_backlog_items.assert_not_called()
+
+
+class StopSync(Exception):
+    """
+    Raised from the patched sleep to end the start_sync loop after one run.
+    """
 
-        self.assertIsNone(result)
 
-    # Tests that matching_user returns None when the ado_user is None.
-    def test_matching_user_ado_user_none(self):
-        user_list = [
-            {"email": "user1@example.com", "name": "User 1"},
-            {"email": "user2@example.com", "name": "User 2"},
-            {"email": "user3@example.com", "name": "User 3"},
+class TestStartSync(unittest.TestCase):
+    def setUp(self) -> None:
+        self.project = {
+            "adoProjectName": "ADO Project",
+            "adoTeamName": "ADO Team",
+            "asanaProjectName": "Asana Project",
+        }
+
+    def tearDown(self) -> None:
+        CUSTOM_FIELDS_CACHE.clear()
+        ASANA_WORKSPACE_GID_CACHE.clear()
+        ASANA_PROJECT_GID_CACHE.clear()
+
+    @patch("ado_asana_sync.sync.sync.sleep", side_effect=StopSync)
+    @patch("ado_asana_sync.sync.sync.sync_project")
+    @patch("ado_asana_sync.sync.sync.read_projects")
+    @patch("ado_asana_sync.sync.sync.create_tag_if_not_existing")
+    @patch("ado_asana_sync.sync.sync.get_asana_workspace")
+    def test_gid_lookup_error_does_not_stop_sync(
+        self,
+        mock_get_asana_workspace,
+        _mock_create_tag_if_not_existing,
+        mock_read_projects,
+        mock_sync_project,
+        _mock_sleep,
+    ):
+        app = MagicMock(thread_count=8)
+        mock_get_asana_workspace.side_effect = [
+            "1",
+            ConnectionError("Connection reset by peer"),
         ]
-        ado_user = None
+        mock_read_projects.return_value = [self.project]
+
+        with self.assertRaises(StopSync):
+            start_sync(app)
+
+        mock_sync_project.assert_called_once_with(app, self.project)
+        app.flush_db.assert_called_once()
+
+    @patch("ado_asana_sync.sync.sync.sleep", side_effect=StopSync)
+    @patch("ado_asana_sync.sync.sync._LOGGER")
+    @patch("ado_asana_sync.sync.sync.sync_project")
+    @patch("ado_asana_sync.sync.sync.read_projects")
+    @patch("ado_asana_sync.sync.sync.resolve_asana_gids")
+    @patch("ado_asana_sync.sync.sync.create_tag_if_not_existing")
+    @patch("ado_asana_sync.sync.sync.get_asana_workspace")
+    def test_project_error_does_not_stop_other_projects(
+        self,
+        _mock_get_asana_workspace,
+        _mock_create_tag_if_not_existing,
+        _mock_resolve_asana_gids,
+        mock_read_projects,
+        mock_sync_project,
+        mock_logger,
+        _mock_sleep,
+    ):
+        app = MagicMock(thread_count=8)
+        broken_project = {**self.project, "asanaProjectName": "Broken Project"}
+        mock_read_projects.return_value = [broken_project, self.project]
+        error = ValueError("Project sync failed")
 
-        result = matching_user(user_list, ado_user)  # NOSONAR
+        def sync_project_side_effect(_app, project):
+            if project is broken_project:
+                raise error
 
-        self.assertIsNone(result)
+        mock_sync_project.side_effect = sync_project_side_effect
+
+        with self.assertRaises(StopSync):
+            start_sync(app)
+
+        mock_sync_project.assert_any_call(app, broken_project)
+        mock_sync_project.assert_any_call(app, self.project)
+        mock_logger.error.assert_called_once_with(
+            "Error syncing project %s: %s", "Broken Project", error
+        )
+        app.flush_db.assert_called_once()
+
+    def _run_with_expired_caches(self):
+        CUSTOM_FIELDS_CACHE["2"] = [{"custom_field": {"name": "Link"}}]
+        ASANA_WORKSPACE_GID_CACHE["Workspace"] = "1"
+        ASANA_PROJECT_GID_CACHE[("1", "Asana Project")] = "2"
+        with self.assertRaises(StopSync):
+            start_sync(MagicMock(thread_count=8))
+
+    @patch("ado_asana_sync.sync.sync.sleep", side_effect=StopSync)
+    @patch("ado_asana_sync.sync.sync.sync_project")
+    @patch("ado_asana_sync.sync.sync.read_projects", return_value=[{}])
+    @patch("ado_asana_sync.sync.sync.resolve_asana_gids")
+    @patch("ado_asana_sync.sync.sync.create_tag_if_not_existing")
+    @patch("ado_asana_sync.sync.sync.get_asana_workspace")
+    @patch(
+        "ado_asana_sync.sync.sync.LAST_CACHE_REFRESH",
+        datetime(2000, 1, 1, tzinfo=timezone.utc),
+    )
+    @patch("ado_asana_sync.sync.sync.CUSTOM_FIELDS_AVAILABLE", True)
+    def test_expired_caches_cleared(self, *_):
+        self._run_with_expired_caches()
+
+        self.assertEqual(CUSTOM_FIELDS_CACHE, {})
+        self.assertEqual(ASANA_WORKSPACE_GID_CACHE, {})
+        self.assertEqual(ASANA_PROJECT_GID_CACHE, {})
+
+    @patch("ado_asana_sync.sync.sync.sleep", side_effect=StopSync)
+    @patch("ado_asana_sync.sync.sync.sync_project")
+    @patch("ado_asana_sync.sync.sync.read_projects", return_value=[{}])
+    @patch("ado_asana_sync.sync.sync.resolve_asana_gids")
+    @patch("ado_asana_sync.sync.sync.create_tag_if_not_existing")
+    @patch("ado_asana_sync.sync.sync.get_asana_workspace")
+    @patch(
+        "ado_asana_sync.sync.sync.LAST_CACHE_REFRESH",
+        datetime(2000, 1, 1, tzinfo=timezone.utc),
+    )
+    @patch("ado_asana_sync.sync.sync.CUSTOM_FIELDS_AVAILABLE", False)
+    def test_custom_fields_cache_kept_when_unavailable(self, *_):
+        self._run_with_expired_caches()
+
+        self.assertIn("2", CUSTOM_FIELDS_CACHE)
+        self.assertEqual(ASANA_WORKSPACE_GID_CACHE, {})
+        self.assertEqual(ASANA_PROJECT_GID_CACHE, {})
 
 
 if __name__ == "__main__":
@@ -1,5 +1,9 @@
+import threading
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
 
 from ado_asana_sync.sync.app import App
 from ado_asana_sync.sync.task_item import TaskItem
@@ -157,3 +161,61 @@ class TestTaskItem(unittest.TestCase):
         result = TaskItem.search(app, asana_gid="987654")
 
         self.assertIsNone(result)
+
+    # Test that save updates every record stored for the ADO ID.
+    def test_save_updates_duplicate_records(self):
+        app = MagicMock(App)
+        app.matches = TinyDB(storage=MemoryStorage).table("matches")
+        app.db_lock = threading.Lock()
+        app.matches.insert(TEST_DB_ITEM_1)
+        app.matches.insert(TEST_DB_ITEM_1)
+        item = TaskItem.from_record(TEST_DB_ITEM_1)
+        item.ado_rev = 2
+
+        item.save(app)
+
+        self.assertEqual([record["ado_rev"] for record in app.matches.all()], [2, 2])
+
+    # Test that items for different ADO IDs are not equal.
+    def test_eq_different_ado_id(self):
+        other = TaskItem(**{**TEST_DB_ITEM_1, "ado_id": 2})
+
+        self.assertNotEqual(TEST_TASK_ITEM_1, other)
+        self.assertEqual(TEST_TASK_ITEM_1, TEST_TASK_ITEM_1)
+
+    # Test that is_current uses the prefetched Asana task instead of calling the API.
+    @patch("ado_asana_sync.sync.task_item.get_asana_task")
+    def test_is_current_uses_prefetched_asana_task(self, mock_get_asana_task):
+        app = MagicMock(App)
+        app.ado_wit_client = MagicMock()
+        app.ado_wit_client.get_work_item.return_value = MagicMock(rev=1)
+        asana_tasks = {
+            "123456": {"gid": "123456", "modified_at": TEST_DB_ITEM_1["asana_updated"]}
+        }
+
+        self.assertTrue(TEST_TASK_ITEM_1.is_current(app, asana_tasks))
+        mock_get_asana_task.assert_not_called()
+
+    # Test that is_current falls back to the Asana API when the task was not prefetched.
+    @patch("ado_asana_sync.sync.task_item.get_asana_task")
+    def test_is_current_fetches_missing_asana_task(self, mock_get_asana_task):
+        app = MagicMock(App)
+        app.ado_wit_client = MagicMock()
+        app.ado_wit_client.get_work_item.return_value = MagicMock(rev=1)
+        mock_get_asana_task.return_value = {"modified_at": "2023-08-02T00:00:00+00:00"}
+
+        asana_tasks = {}
+
+        self.assertFalse(TEST_TASK_ITEM_1.is_current(app, asana_tasks))
+        mock_get_asana_task.assert_called_once_with(app, "123456")
+        self.assertEqual(asana_tasks, {"123456": mock_get_asana_task.return_value})
+
+    # Test that is_current uses the given ADO task and skips Asana when the revision has changed.
+    @patch("ado_asana_sync.sync.task_item.get_asana_task")
+    def test_is_current_changed_ado_rev(self, mock_get_asana_task):
+        app = MagicMock(App)
+        app.ado_wit_client = MagicMock()
+
+        self.assertFalse(TEST_TASK_ITEM_1.is_current(app, {}, MagicMock(rev=2)))
+        app.ado_wit_client.get_work_item.assert_not_called()
+        mock_get_asana_task.assert_not_called()
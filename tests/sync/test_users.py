@@ -0,0 +1,215 @@
+import unittest
+
+from azure.devops.v7_0.work_item_tracking.models import WorkItem
+
+from ado_asana_sync.sync.users import (
+    ADOAssignedUser,
+    find_indexed_user,
+    get_task_user,
+    index_asana_users,
+)
+
+
+class TestGetTaskUserEmail(unittest.TestCase):
+    # Tests that the function returns the email address of the user assigned to the work item when the System.AssignedTo field has a uniqueName
+    def test_assigned_user_with_uniqueName(self):
+        task = WorkItem()
+        task.fields = {
+            "System.AssignedTo": {
+                "uniqueName": "john.doe@example.com",
+                "displayName": "John Doe",
+            }
+        }
+        ado_user = ADOAssignedUser(
+            display_name="John Doe", email="john.doe@example.com"
+        )
+        result = get_task_user(task)
+        self.assertEqual(result, ado_user)
+
+    # Tests that the function returns None when the System.AssignedTo field is not present in the work item
+    def test_no_assigned_user(self):
+        task = WorkItem()
+        task.fields = {}
+        result = get_task_user(task)
+        self.assertIsNone(result)
+
+    # Tests that the function returns None when the System.AssignedTo field is present but does not have a uniqueName field
+    def test_missing_uniqueName(self):
+        task = WorkItem()
+        task.fields = {"System.AssignedTo": {}}
+        result = get_task_user(task)
+        self.assertIsNone(result)
+
+    # Tests that the function returns the email address even if the uniqueName field in the System.AssignedTo field is not a valid email address
+    def test_invalid_email_address(self):
+        task = WorkItem()
+        task.fields = {
+            "System.AssignedTo": {
+                "uniqueName": "john.doe",
+                "displayName": "John Doe",
+            }
+        }
+        ado_user = ADOAssignedUser(display_name="John Doe", email="john.doe")
+        result = get_task_user(task)
+        self.assertEqual(result, ado_user)
+
+    # Tests that the function returns None when the System.AssignedTo field is present but is None
+    def test_assigned_user_is_None(self):
+        task = WorkItem()
+        task.fields = {"System.AssignedTo": None}
+        result = get_task_user(task)
+        self.assertIsNone(result)
+
+
+class TestFindIndexedUser(unittest.TestCase):
+    # Tests that find_indexed_user returns the matching user when the email exists in the user_list.
+    def test_find_indexed_user_matching_email_exists(self):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 1"},
+            {"email": "user2@example.com", "name": "User 2"},
+            {"email": "user3@example.com", "name": "User 3"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User Two", email="user2@example.com")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertEqual(result, {"email": "user2@example.com", "name": "User 2"})
+
+    # Tests that find_indexed_user returns the matching user when the display name exists in the user_list.
+    def test_find_indexed_user_matching_display_name_exists(self):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 1"},
+            {"email": "user2@example.com", "name": "User 2"},
+            {"email": "user3@example.com", "name": "User 3"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.co.uk")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertEqual(result, {"email": "user2@example.com", "name": "User 2"})
+
+    # Tests that find_indexed_user returns the matching user when the email exists in another case in the user_list.
+    def test_find_indexed_user_matching_email_exists_other_case(self):
+        user_list = [
+            {"email": "USER1@EXAMPLE.COM", "name": "USER 1"},
+            {"email": "USER2@EXAMPLE.COM", "name": "USER 2"},
+            {"email": "USER3@EXAMPLE.COM", "name": "USER 3"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User Two", email="user2@example.com")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertEqual(result, {"email": "USER2@EXAMPLE.COM", "name": "USER 2"})
+
+    # Tests that find_indexed_user returns the matching user when the display name exists in another case in the user_list.
+    def test_find_indexed_user_matching_display_name_exists_other_case(self):
+        user_list = [
+            {"email": "USER1@EXAMPLE.COM", "name": "USER 1"},
+            {"email": "USER2@EXAMPLE.COM", "name": "USER 2"},
+            {"email": "USER3@EXAMPLE.COM", "name": "USER 3"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.co.uk")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertEqual(result, {"email": "USER2@EXAMPLE.COM", "name": "USER 2"})
+
+    # Tests that find_indexed_user returns None when the email does not exist in the user_list.
+    def test_find_indexed_user_matching_email_does_not_exist(self):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 1"},
+            {"email": "user2@example.com", "name": "User 2"},
+            {"email": "user3@example.com", "name": "User 3"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User 4", email="user4@example.com")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertIsNone(result)
+
+    # Tests that find_indexed_user returns None when the user_list is empty.
+    def test_find_indexed_user_user_list_empty(self):
+        user_list = []
+        ado_user = ADOAssignedUser(display_name="User 1", email="user1@example.com")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertIsNone(result)
+
+    # Tests that find_indexed_user returns None when the email is an empty string.
+    def test_find_indexed_user_email_empty(self):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 1"},
+            {"email": "user2@example.com", "name": "User 2"},
+            {"email": "user3@example.com", "name": "User 3"},
+        ]
+        ado_user = ADOAssignedUser(display_name="", email="")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertIsNone(result)
+
+    # Tests that find_indexed_user returns the user when the user_list contains only one user and the email matches that user's email.
+    def test_find_indexed_user_user_list_contains_one_user_email_matches(self):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 1"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User 1", email="user1@example.com")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertEqual(result, {"email": "user1@example.com", "name": "User 1"})
+
+    # Tests that find_indexed_user returns None when the user_list contains only one user and the email does not match that user's email.
+    def test_find_indexed_user_user_list_contains_one_user_email_does_not_match(
+        self,
+    ):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 1"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.com")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertIsNone(result)
+
+    # Tests that find_indexed_user returns None when the ado_user is None.
+    def test_find_indexed_user_ado_user_none(self):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 1"},
+            {"email": "user2@example.com", "name": "User 2"},
+            {"email": "user3@example.com", "name": "User 3"},
+        ]
+        ado_user = None
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)  # NOSONAR
+
+        self.assertIsNone(result)
+
+    # Tests that find_indexed_user finds the user through a prebuilt index.
+    def test_find_indexed_user(self):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 1"},
+            {"email": "user2@example.com", "name": "User 2"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User Two", email="USER2@example.com")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertEqual(result, {"email": "user2@example.com", "name": "User 2"})
+
+    # Tests that find_indexed_user returns the first user in the list when the email and name match different users.
+    def test_find_indexed_user_returns_first_match(self):
+        user_list = [
+            {"email": "user1@example.com", "name": "User 2"},
+            {"email": "user2@example.com", "name": "Someone"},
+        ]
+        ado_user = ADOAssignedUser(display_name="User 2", email="user2@example.com")
+
+        result = find_indexed_user(index_asana_users(user_list), ado_user)
+
+        self.assertEqual(result, {"email": "user1@example.com", "name": "User 2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,11 @@ class TestLoggingTracing(unittest.TestCase):
         self.assertIsInstance(logger, logging.Logger)
         self.assertIsInstance(tracer, trace.Tracer)
 
+    def test_setup_logging_and_tracing_is_cached(self):
+        first = setup_logging_and_tracing(__name__)
+        second = setup_logging_and_tracing(__name__)
+        self.assertIs(first, second)
+
 
 if __name__ == "__main__":
     unittest.main()